@@ -0,0 +1,34 @@
+"""Every dashboard in one Streamlit server: streamlit run app.py
+
+Each page runs its app's own app.py (see common/pages.py), so one process
+and one set of caches serve them all. Streamlit before 1.36 finds the pages
+in pages/; later versions get the same list through st.navigation. The
+requirements.txt next to this file covers every app.
+"""
+import streamlit as st
+
+from common.pages import APPS, page, script
+
+
+def home(links):
+    st.title("Dashboards")
+    st.markdown("Each dashboard loads its data on its first visit.")
+    for app, (title, icon) in APPS.items():
+        st.page_link(links[app], label=title, icon=icon)
+
+
+if hasattr(st, "navigation"):
+    pages = {
+        app: st.Page(script(app), title=title, icon=icon)
+        for app, (title, icon) in APPS.items()
+    }
+
+    def dashboards():
+        home(pages)
+
+    st.navigation(
+        [st.Page(dashboards, title="Dashboards", default=True)] + list(pages.values())
+    ).run()
+else:
+    st.set_page_config(page_title="Dashboards", page_icon=":bar_chart:", layout="wide")
+    home({app: page(app) for app in APPS})
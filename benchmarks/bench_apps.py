@@ -0,0 +1,133 @@
+"""End-to-end page render benchmark for every app in the repo.
+
+Each app is rendered headlessly (streamlit.testing AppTest) against
+synthetic replay fixtures at several data scales, once cold and once as a
+warm rerun. Per-phase timings and peak memory are written to
+benchmarks/results/<commit>.json, and --compare prints the change against
+an earlier results file.
+
+    python benchmarks/bench_apps.py
+    python benchmarks/bench_apps.py --apps ethminers --scales 1 10 --latency 0.2
+    python benchmarks/bench_apps.py --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fixtures
+from common import replay
+
+ROOT = fixtures.ROOT
+APPS = ["ethminers", "shroommint", "osmosis_stables", "velodrome"]
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(app, scale, config, timeout):
+    with tempfile.TemporaryDirectory() as directory:
+        fixture_dir = fixtures.generate(app, scale, directory)
+        server = replay.serve(replay.Fixtures.load(fixture_dir), config)
+        env = dict(
+            os.environ,
+            CACHE_DIR=os.path.join(directory, "cache"),
+            **replay.env(server.url),
+        )
+        try:
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.join(ROOT, "benchmarks", "run_app.py"),
+                    os.path.join(ROOT, app, "app.py"),
+                    str(timeout),
+                ],
+                cwd=directory,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+        finally:
+            server.shutdown()
+    if result.returncode:
+        return dict(error=result.stderr.strip().splitlines()[-1:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(old, new):
+    previous = {(r["app"], r["scale"]): r for r in old["results"]}
+    print(f"{'app':<16}{'scale':>6}{'cold s':>10}{'was':>10}{'warm s':>10}{'was':>10}")
+    for result in new["results"]:
+        before = previous.get((result["app"], result["scale"]))
+        if before is None or "error" in result or "error" in before:
+            continue
+        print(
+            f"{result['app']:<16}{result['scale']:>6}"
+            f"{result['cold']['wall']:>10.3f}{before['cold']['wall']:>10.3f}"
+            f"{result['warm']['wall']:>10.3f}{before['warm']['wall']:>10.3f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apps", nargs="+", default=APPS, choices=APPS)
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args(argv)
+
+    config = replay.ReplayConfig(latency=args.latency, seed=0)
+    report = dict(
+        commit=commit(),
+        created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        python=platform.python_version(),
+        latency=args.latency,
+        results=[],
+    )
+    for app in args.apps:
+        for scale in args.scales:
+            result = dict(app=app, scale=scale, **run(app, scale, config, args.timeout))
+            report["results"].append(result)
+            if "error" in result:
+                print(f"{app:<16} x{scale:<4} failed: {result['error']}")
+                continue
+            cold, warm = result["cold"], result["warm"]
+            phases = "  ".join(f"{k} {v:.3f}s" for k, v in cold["phases"].items())
+            print(
+                f"{app:<16} x{scale:<4} cold {cold['wall']:.3f}s ({phases})"
+                f"  warm {warm['wall']:.3f}s  peak {warm['peak_rss_mb']} MB"
+            )
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", report["commit"] + ".json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("results written to", output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
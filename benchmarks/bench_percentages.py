@@ -0,0 +1,43 @@
+"""Micro-benchmark: bucket_percentages vs. the per-column pandas expressions.
+
+Run from the repo root: python benchmarks/bench_percentages.py [rows ...]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.frames import bucket_percentages
+
+COLUMNS = [f"bucket {i}" for i in range(6)]
+
+
+def per_column(df):
+    for column in COLUMNS:
+        total = df[COLUMNS[0]]
+        for other in COLUMNS[1:]:
+            total = total + df[other]
+        df[column + " %"] = df[column] * 100 / total
+    return df
+
+
+def vectorized(df):
+    return bucket_percentages(df, COLUMNS)
+
+
+def main(sizes):
+    rng = np.random.default_rng(0)
+    for rows in sizes:
+        df = pd.DataFrame(rng.integers(0, 1000, (rows, len(COLUMNS))), columns=COLUMNS)
+        pd.testing.assert_frame_equal(per_column(df.copy()), vectorized(df.copy()))
+        for func in (per_column, vectorized):
+            runs = timeit.repeat(lambda: func(df.copy()), number=10, repeat=5)
+            print(f"{rows:>9} rows  {func.__name__:<11} {min(runs) * 100:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,42 @@
+"""Load-test the Flipside query runner against the local replay server.
+
+Run from the repo root: python benchmarks/bench_polling.py [queries]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import flipside, replay
+
+SCENARIOS = dict(
+    fast=replay.ReplayConfig(seed=1),
+    slow=replay.ReplayConfig(latency=0.2, jitter=0.2, seed=1),
+    running=replay.ReplayConfig(latency=0.05, running_polls=3, seed=1),
+    flaky=replay.ReplayConfig(latency=0.05, fail_rate=0.3, running_polls=1, seed=1),
+)
+
+
+def main(queries):
+    fixtures = replay.Fixtures(
+        replay.query_fixture(f"select {i}", ["N"], [[i]] * 100) for i in range(queries)
+    )
+    for name, config in SCENARIOS.items():
+        server = replay.serve(fixtures, config)
+        flipside.BASE_URL = server.url
+        flipside.timings.clear()
+        started = time.monotonic()
+        flipside.run_queries({i: f"select {i}" for i in range(queries)})
+        wall = time.monotonic() - started
+        server.shutdown()
+        polls = sum(timing.polls for timing in flipside.timings)
+        slowest = max(timing.wall_seconds for timing in flipside.timings)
+        print(
+            f"{name:<8} {queries} queries  wall {wall:6.2f}s"
+            f"  slowest query {slowest:6.2f}s  polls {polls}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8)
@@ -0,0 +1,258 @@
+"""Synthetic replay fixtures shaped like each app's real query results.
+
+scale=1 is roughly the history the dashboards were built against; larger
+scales add proportionally more rows (more miners, more mints, longer
+histories) so the apps can be timed as their data grows.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common import replay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MINT_CONTRACT = "0xdfb57b6e16ddb97aeb8847386989f4dca7202146"
+GOD_MODE_CONTRACT = "0x903e2f5d42ee23156d548dd46bb84b7873789e44"
+STABLES = ["USTC", "USDC", "axlUSDC", "DAI", "EEUR"]
+OSMOSIS_QUERIES = dict(
+    tfx="d16b470b-9e22-492e-aa13-51b9047e7a61",
+    to_stbl_swaps="c97dc80b-cf50-497b-857f-4529bef247d2",
+    from_stbl_swaps="d26867a8-93a0-428b-9549-7ec6d5d7af40",
+)
+UST_PRICE_PATH = (
+    "/api/v3/coins/terrausd/market_chart?vs_currency=usd&days=200&interval=daily"
+)
+BUCKETS = [
+    ("less than 10 transactions", 0, 9),
+    ("10 to 100 transactions", 10, 99),
+    ("100 to 200 transactions", 100, 199),
+    ("200 to 300 transactions", 200, 299),
+    ("300 to 500 transactions", 300, 499),
+    ("more than 500 transactions", 500, 1500),
+]
+
+
+def addresses(rng, n):
+    return np.array(
+        ["0x" + row.tobytes().hex() for row in rng.integers(0, 256, (n, 20), np.uint8)]
+    )
+
+
+def timestamps(start, end, n):
+    values = pd.to_datetime(
+        np.linspace(pd.Timestamp(start).value, pd.Timestamp(end).value, n)
+    )
+    return values.strftime("%Y-%m-%d %H:%M:%S.000").tolist()
+
+
+def block_numbers(values):
+    # about one block every 12 seconds, counted from the merge-era height
+    seconds = (pd.to_datetime(values) - pd.Timestamp("2022-07-01")).total_seconds()
+    return (15_050_000 + seconds // 12).astype("int64")
+
+
+def matcher(match, df):
+    fixture = replay.frame_fixture("", df)
+    fixture["match"] = match
+    return fixture
+
+
+def ethminers(rng, scale):
+    days = 2600 * scale
+    daily = pd.DataFrame(
+        dict(
+            DATE=timestamps("2015-07-30", "2022-09-15", days),
+            MINERS=rng.integers(50, 400, days),
+            TXS=rng.integers(10_000, 1_500_000, days),
+        )
+    )
+
+    rows = []
+    for miner in addresses(rng, 300 * scale):
+        first = rng.integers(2015, 2023)
+        for year in range(first, min(first + rng.integers(1, 5), 2023)):
+            for category, low, high in BUCKETS:
+                blocks = int(rng.integers(0, 2000))
+                if blocks:
+                    rows.append(
+                        (
+                            miner,
+                            f"{year}-01-01 00:00:00.000",
+                            category,
+                            blocks,
+                            blocks * (low + high) // 2,
+                            low,
+                            high,
+                        )
+                    )
+    blocks = pd.DataFrame(
+        rows, columns=["MINER", "YEAR", "CATEGORY", "BLOCKS", "TXS", "MIN", "MAX"]
+    )
+    return [
+        matcher(["count(distinct miner)", "fact_blocks"], daily),
+        matcher(["group by miner, year, category"], blocks),
+    ]
+
+
+def shroommint(rng, scale):
+    holders = addresses(rng, 5000 * scale)
+    mints, transfers = 10_000 * scale, 3_000 * scale
+    start = pd.Timestamp("2022-07-15")
+    end = start + pd.Timedelta(days=30 * scale)
+    nft_timestamps = timestamps(start, end, mints) + timestamps(start, end, transfers)
+    nft = pd.DataFrame(
+        dict(
+            BLOCK_NUMBER=block_numbers(nft_timestamps),
+            BLOCK_TIMESTAMP=nft_timestamps,
+            TOKENID=np.concatenate(
+                [np.arange(mints), rng.integers(0, mints, transfers)]
+            ),
+            NFT_FROM_ADDRESS=np.concatenate(
+                [np.repeat("0x" + "0" * 40, mints), rng.choice(holders, transfers)]
+            ),
+            NFT_TO_ADDRESS=rng.choice(holders, mints + transfers),
+            EVENT_TYPE=["mint"] * mints + ["other"] * transfers,
+        )
+    )
+    god_rows = 2_000 * scale
+    god_timestamps = timestamps(start, end, god_rows)
+    god = pd.DataFrame(
+        dict(
+            BLOCK_NUMBER=block_numbers(god_timestamps),
+            BLOCK_TIMESTAMP=god_timestamps,
+            EVENT_TYPE="mint",
+            NFT_FROM_ADDRESS="0x" + "0" * 40,
+            NFT_TO_ADDRESS=rng.choice(holders, god_rows),
+            TOKENID=np.arange(god_rows),
+        )
+    )
+    fail_rows = 2_000 * scale
+    fails = pd.DataFrame(
+        dict(
+            BLOCK_TIMESTAMP=timestamps(start, end, fail_rows),
+            FROM_ADDRESS=rng.choice(holders, fail_rows),
+            TO_ADDRESS=MINT_CONTRACT,
+            CHAIN=rng.choice(["Ethereum", "Arbitrum", "Binance", "Polygon"], fail_rows),
+            TX_FEE=rng.random(fail_rows) / 100,
+        )
+    )
+    bounty = pd.DataFrame(dict(BOUNTY_HUNTERS=[int(len(holders) * 0.1)]))
+    return [
+        matcher(["select block_number, block_timestamp", MINT_CONTRACT], nft),
+        matcher(["select block_number, block_timestamp", GOD_MODE_CONTRACT], god),
+        matcher(["fact_event_logs"], bounty),
+        matcher(["fact_transactions"], fails),
+    ]
+
+
+def osmosis_stables(rng, scale):
+    end = pd.Timestamp("2022-09-15")
+    dates = pd.date_range(end=end, periods=200 * scale, freq="D")
+    grid = pd.MultiIndex.from_product(
+        [dates, STABLES], names=["DATE", "TOKEN"]
+    ).to_frame(index=False)
+    n = len(grid)
+    date_strings = grid.DATE.dt.strftime("%Y-%m-%d %H:%M:%S.000")
+    tfx = pd.DataFrame(
+        {
+            "DATE": date_strings,
+            "TOKEN": grid.TOKEN,
+            "Amount": rng.random(n) * 1e6,
+            "IBC-Out amount": rng.random(n) * 1e5,
+            "Senders": rng.integers(1, 500, n),
+        }
+    )
+    to_swaps = pd.DataFrame(
+        dict(
+            DATE=date_strings,
+            TO_TOKEN=grid.TOKEN,
+            TO_AMOUNT=rng.random(n) * 1e6,
+            TO_SWAPPERS=rng.integers(1, 500, n),
+        )
+    )
+    from_swaps = pd.DataFrame(
+        dict(
+            DATE=date_strings,
+            FROM_TOKEN=grid.TOKEN,
+            FROM_AMOUNT=rng.random(n) * 1e6,
+            FROM_SWAPPERS=rng.integers(1, 500, n),
+        )
+    )
+    price_days = pd.date_range(end=end + pd.Timedelta(days=1), periods=201, freq="D")
+    millis = (price_days.asi8 // 1_000_000).tolist()
+    prices = rng.random(201).tolist()
+    fixtures = [
+        replay.url_fixture(
+            f"/api/v2/queries/{query}/data/latest",
+            json_records(df),
+        )
+        for query, df in zip(OSMOSIS_QUERIES.values(), (tfx, to_swaps, from_swaps))
+    ]
+    fixtures.append(
+        replay.url_fixture(
+            UST_PRICE_PATH,
+            dict(
+                prices=[list(pair) for pair in zip(millis, prices)],
+                market_caps=[list(pair) for pair in zip(millis, prices)],
+                total_volumes=[list(pair) for pair in zip(millis, prices)],
+            ),
+        )
+    )
+    return fixtures
+
+
+def json_records(df):
+    return json.loads(df.to_json(orient="records"))
+
+
+def velodrome(rng, scale, directory):
+    tokens = pd.read_parquet(
+        os.path.join(ROOT, "velodrome", "data", "op_tokens.parquet")
+    )
+    pools = pd.DataFrame(
+        dict(
+            POOL_ADDRESS=addresses(rng, 40),
+            TOKEN0=rng.choice(tokens.ADDRESS, 40),
+            TOKEN1=rng.choice(tokens.ADDRESS, 40),
+        )
+    )
+    n = 50_000 * scale
+    picked = pools.iloc[rng.integers(0, len(pools), n)].reset_index(drop=True)
+    txs = pd.DataFrame(
+        dict(
+            BLOCK_TIMESTAMP=pd.to_datetime(
+                timestamps(
+                    "2022-06-01",
+                    pd.Timestamp("2022-06-01") + pd.Timedelta(days=90 * scale),
+                    n,
+                )
+            ),
+            TX_HASH=addresses(rng, n),
+            EVENT_NAME=rng.choice(["Swap", "Mint", "Burn"], n, p=[0.8, 0.1, 0.1]),
+            POOL_ADDRESS=picked.POOL_ADDRESS,
+            TOKEN0=picked.TOKEN0,
+            TOKEN1=picked.TOKEN1,
+            AMOUNT0=rng.random(n) * 1e4,
+            AMOUNT1=rng.random(n) * 1e4,
+        )
+    )
+    os.makedirs(os.path.join(directory, "data"), exist_ok=True)
+    txs.to_parquet(os.path.join(directory, "data", "pool_txs_proc.parquet"))
+    return []
+
+
+def generate(app, scale, directory, seed=0):
+    """Write the fixtures (and data files) app needs into directory."""
+    rng = np.random.default_rng(seed)
+    if app == "velodrome":
+        fixtures = velodrome(rng, scale, directory)
+    else:
+        fixtures = globals()[app](rng, scale)
+    fixture_dir = os.path.join(directory, "fixtures")
+    os.makedirs(fixture_dir, exist_ok=True)
+    for i, fixture in enumerate(fixtures):
+        replay.save_fixture(os.path.join(fixture_dir, f"{app}_{i}.json"), fixture)
+    return fixture_dir
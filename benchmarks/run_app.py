@@ -0,0 +1,130 @@
+"""Render one app headlessly and print its timings as JSON.
+
+Used by bench_apps.py, which runs it in a fresh process per app and scale
+with the environment pointing at a replay server. The script thread is
+sampled every millisecond and each sample is charged to a phase by the
+modules on its stack: fetch (HTTP, disk cache, query runners), render
+(Streamlit elements serializing figures), figures (Plotly) or transform
+(everything else, mostly pandas).
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PHASES = [
+    (
+        "fetch",
+        (
+            "requests",
+            "urllib",
+            "urllib3",
+            "http",
+            "socket",
+            "ssl",
+            "shroomdk",
+            "concurrent.futures",
+            "common.cache",
+            "common.flipside",
+            "common.incremental",
+        ),
+    ),
+    ("render", ("streamlit.elements",)),
+    ("figures", ("plotly",)),
+]
+
+
+def _phase(frames):
+    modules = [frame.f_globals.get("__name__") or "" for frame in frames]
+    for phase, prefixes in PHASES:
+        if any(module.startswith(prefixes) for module in modules):
+            return phase
+    return "transform"
+
+
+class PhaseSampler(threading.Thread):
+    def __init__(self, script, interval=0.001):
+        super().__init__(daemon=True)
+        self.script = os.path.abspath(script)
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+
+    def _script_stack(self):
+        for frame in sys._current_frames().values():
+            stack = []
+            while frame is not None:
+                if frame.f_code.co_filename == self.script:
+                    return stack
+                stack.append(frame)
+                frame = frame.f_back
+        return None
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            stack = self._script_stack()
+            if stack is not None:
+                self.samples[_phase(stack)] += 1
+
+    def phases(self, wall):
+        total = sum(self.samples.values()) or 1
+        return {
+            phase: round(wall * self.samples[phase] / total, 4)
+            for phase in ("fetch", "transform", "figures", "render")
+        }
+
+
+def _peak_rss_mb():
+    # ru_maxrss can carry over the parent's peak across fork/exec on Linux,
+    # the high water mark in /proc belongs to this process image only
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(app_test, script):
+    sampler = PhaseSampler(script)
+    sampler.start()
+    started = time.perf_counter()
+    app_test.run()
+    wall = time.perf_counter() - started
+    sampler.stopped.set()
+    sampler.join()
+    return dict(
+        wall=round(wall, 4),
+        phases=sampler.phases(wall),
+        peak_rss_mb=_peak_rss_mb(),
+        exceptions=[e.message for e in app_test.exception],
+    )
+
+
+def main(script, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    baseline = _peak_rss_mb()
+    app_test = AppTest.from_file(os.path.abspath(script), default_timeout=timeout)
+    cold = measure(app_test, script)
+    # a rerun with warm caches, as after a widget interaction
+    warm = measure(app_test, script)
+    report = dict(baseline_rss_mb=baseline, cold=cold, warm=warm)
+    from common import profiling
+
+    if profiling.ENABLED:
+        # with PROFILE_SECTIONS=1 the apps' own per-section records come along
+        report["sections"] = list(profiling.runs)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 600)
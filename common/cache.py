@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(ROOT, ".cache"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 1024**3))
+# tables live outside the LRU area and are never evicted
+TABLES_DIR = os.path.join(CACHE_DIR, "tables")
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+
+# loads in progress by key, so concurrent callers in the process share one
+_flights = {}
+_flights_lock = threading.Lock()
+# refreshes of expired entries, run while the stale entry is being served
+_revalidator = ThreadPoolExecutor(max_workers=4, thread_name_prefix="revalidate")
+_force = threading.local()
+
+
+def normalize(text):
+    return " ".join(text.split())
+
+
+def cache_key(text):
+    return hashlib.sha256(normalize(text).encode()).hexdigest()[:32]
+
+
+def _paths(key):
+    base = os.path.join(CACHE_DIR, key)
+    return base + ".parquet", base + ".json"
+
+
+def load_entry(text, ttl=None):
+    """Return (frame, fresh) for a SQL text or URL, or (None, False) if missing.
+
+    An expired entry is still returned, with fresh False, until it is evicted.
+    """
+    data_path, meta_path = _paths(cache_key(text))
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        ttl = meta["ttl"] if ttl is None else ttl
+        fresh = ttl is None or time.time() - meta["created"] <= ttl
+        df = pd.read_parquet(data_path)
+    except (OSError, ValueError):
+        return None, False
+    # the data file's mtime doubles as the LRU access time
+    try:
+        os.utime(data_path)
+    except FileNotFoundError:
+        # evicted since it was read, the frame is still good to serve
+        pass
+    return df, fresh
+
+
+def load(text, ttl=None):
+    """Return the cached frame for a SQL text or URL, or None if missing or expired."""
+    df, fresh = load_entry(text, ttl)
+    return df if fresh else None
+
+
+def store(text, df, ttl=None):
+    key = cache_key(text)
+    data_path, meta_path = _paths(key)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # unique per writer, the scheduler and the server may store the same key
+    suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        df.to_parquet(data_path + suffix)
+        size = os.path.getsize(data_path + suffix)
+        os.replace(data_path + suffix, data_path)
+        meta = dict(
+            key=normalize(text), created=time.time(), ttl=ttl, rows=len(df), bytes=size
+        )
+        with open(meta_path + suffix, "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+    except Exception:
+        logger.warning("could not cache %s", normalize(text)[:80], exc_info=True)
+        return
+    evict()
+
+
+def evict(max_bytes=None):
+    """Drop least recently used entries until the cache fits in max_bytes."""
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        try:
+            entries = [
+                e
+                for e in os.scandir(CACHE_DIR)
+                if e.is_file() and e.name.endswith(".parquet")
+            ]
+        except FileNotFoundError:
+            return
+        stats = []
+        for entry in entries:
+            try:
+                stats.append((entry.name, entry.stat()))
+            except FileNotFoundError:
+                # evicted by another process since the scan
+                continue
+        stats.sort(key=lambda item: item[1].st_mtime)
+        total = sum(stat.st_size for _, stat in stats)
+        for name, stat in stats:
+            if total <= max_bytes:
+                break
+            total -= stat.st_size
+            for path in _paths(name[: -len(".parquet")]):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+def single_flight(key, loader):
+    """Return loader(), or wait for and share the result of a call already running for key.
+
+    Waiters get their own copy of a frame, so callers may modify what they get.
+    """
+    with _flights_lock:
+        future = _flights.get(key)
+        leader = future is None
+        if leader:
+            future = _flights[key] = Future()
+    if not leader:
+        result = future.result()
+        return result.copy() if isinstance(result, pd.DataFrame) else result
+    try:
+        result = loader()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _flights_lock:
+            del _flights[key]
+
+
+def _revalidate(key, loader):
+    try:
+        single_flight(key, loader)
+    except Exception:
+        logger.warning("background refresh of %s failed", key, exc_info=True)
+
+
+def revalidate(key, loader):
+    """Run loader for key in the background, unless a load of key is already running."""
+    with _flights_lock:
+        if key in _flights:
+            return
+    _revalidator.submit(_revalidate, key, loader)
+
+
+@contextmanager
+def forced():
+    """Within the block, this thread's cached loads reload and replace fresh entries too."""
+    _force.on = True
+    try:
+        yield
+    finally:
+        _force.on = False
+
+
+def forcing():
+    return getattr(_force, "on", False)
+
+
+def _fetch(text, ttl, loader):
+    # a leader that started just after another one finished finds its result
+    df = None if forcing() else load(text, ttl)
+    if df is None:
+        df = loader()
+        store(text, df, ttl)
+    return df
+
+
+def cached_frame(text, ttl, loader):
+    """Serve text's frame from disk, calling loader at most once at a time per text.
+
+    A fresh entry is returned as is. An expired one is returned too, while
+    loader refreshes it in the background. Without an entry, concurrent
+    callers wait for a single loader call and share its result.
+    """
+    df, fresh = (None, False) if forcing() else load_entry(text, ttl)
+    if df is None:
+        return single_flight(cache_key(text), lambda: _fetch(text, ttl, loader))
+    if not fresh:
+        revalidate(cache_key(text), lambda: _fetch(text, ttl, loader))
+    return df
+
+
+def load_table(name):
+    try:
+        return pd.read_parquet(os.path.join(TABLES_DIR, name + ".parquet"))
+    except (OSError, ValueError):
+        return None
+
+
+def save_table(name, df):
+    os.makedirs(TABLES_DIR, exist_ok=True)
+    path = os.path.join(TABLES_DIR, name + ".parquet")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+def table_modified(name):
+    """When the table was last saved (its mtime), or None if there is none."""
+    try:
+        return os.path.getmtime(os.path.join(TABLES_DIR, name + ".parquet"))
+    except OSError:
+        return None
+
+
+def table_age(name):
+    """Seconds since the table was last saved, or None if there is none."""
+    modified = table_modified(name)
+    return None if modified is None else time.time() - modified
@@ -0,0 +1,124 @@
+import itertools
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# roughly one point per pixel of a full-width chart, 0 turns decimation off
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 1200))
+# built figures kept per process, shared by every session, 0 turns it off
+FIGURE_CACHE_SIZE = int(os.getenv("FIGURE_CACHE_SIZE", 256))
+
+logger = logging.getLogger(__name__)
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype("int64")
+    return np.nan_to_num(values.astype("float64"))
+
+
+def lttb(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+
+    # first and last points are always kept, the rest is split into buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    edges = np.append(edges, n)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_x = x[hi : edges[i + 2]].mean()
+        next_y = y[hi : edges[i + 2]].mean()
+        # pick the point forming the largest triangle with the previously
+        # kept point and the average of the next bucket
+        area = np.abs(
+            (x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a])
+        )
+        a = lo + area.argmax()
+        kept[i + 1] = a
+    return kept
+
+
+def decimate(df, x, y, points=None, by=None):
+    """Downsample df to about `points` rows per series before plotting it."""
+    points = CHART_MAX_POINTS if points is None else points
+    if not points:
+        return df
+    if by is not None:
+        groups = df.groupby(by, observed=True)
+        return pd.concat([decimate(group, x, y, points) for _, group in groups])
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), points)]
+
+
+def rebin(df, x, y, points=None, by=None):
+    """Sum y into equal time bins of x, so each series has about `points` bars.
+
+    For bar charts of counts, where decimate() would drop bars and with them
+    part of the totals: every row lands in a bin, so the bars still add up.
+    """
+    points = CHART_MAX_POINTS if points is None else points
+    longest = len(df) if by is None else df.groupby(by, observed=True).size().max()
+    if not points or len(df) == 0 or longest <= points:
+        return df
+    width = pd.Timedelta((df[x].max() - df[x].min()) / points).ceil("s")
+    if width >= pd.Timedelta(hours=1):
+        width = width.ceil("h")
+    keys = [df[x].dt.floor(width).rename(x)] + ([] if by is None else [by])
+    return df.groupby(keys, observed=True)[y].sum().reset_index()
+
+
+def log_payload(fig, name):
+    # serializing is not free, so only measure when someone is listening
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("chart %s payload %d bytes", name, len(fig.to_json()))
+    return fig
+
+
+_versions = itertools.count(1)
+_figures = OrderedDict()
+_figures_lock = threading.Lock()
+
+
+def data_version(df):
+    """A token for this load of df, new for every frame a loader returns.
+
+    Stored in df.attrs, so the frames st.cache hands back on a rerun keep
+    their version and a reload (or a scheduler refresh) gets a new one.
+    """
+    if "version" not in df.attrs:
+        df.attrs["version"] = next(_versions)
+    return df.attrs["version"]
+
+
+def cached_figure(chart, key, build):
+    """build() for chart, reused while key (data versions, filters) is unchanged.
+
+    A hit hands back the figure built earlier, skipping the pandas work and
+    Plotly's trace construction and validation; the least recently used
+    figures are dropped past FIGURE_CACHE_SIZE. Figures are shared between
+    sessions, so callers must not modify what they get back.
+    """
+    if not FIGURE_CACHE_SIZE:
+        return build()
+    key = (chart, key)
+    with _figures_lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+            return fig
+    fig = build()
+    with _figures_lock:
+        _figures[key] = fig
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig
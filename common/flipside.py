@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from common import cache
+
+API_KEY = os.getenv("API_KEY")
+BASE_URL = os.getenv("FLIPSIDE_BASE_URL", "https://node-api.flipsidecrypto.com")
+QUERY_DEADLINE = float(os.getenv("FLIPSIDE_QUERY_DEADLINE", 20 * 60))
+PAGE_SIZE = int(os.getenv("FLIPSIDE_PAGE_SIZE", 100_000))
+# smaller pages for results that are drawn while they download
+STREAM_PAGE_SIZE = int(os.getenv("FLIPSIDE_STREAM_PAGE_SIZE", 25_000))
+PREVIEW_EVERY = int(os.getenv("FLIPSIDE_PREVIEW_EVERY", 4))
+# per request, and never past the query's deadline
+CONNECT_TIMEOUT = float(os.getenv("FLIPSIDE_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("FLIPSIDE_READ_TIMEOUT", 5 * 60))
+
+HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
+logger = logging.getLogger(__name__)
+
+# keep-alive connections shared by every poller in the process
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# the most recent query timings, newest last
+timings = deque(maxlen=100)
+
+
+@dataclass
+class QueryTiming:
+    token: str = None
+    submitted_at: float = field(default_factory=time.time)
+    submit_seconds: float = 0.0
+    first_byte_seconds: float = None
+    polls: int = 0
+    wall_seconds: float = None
+    rows: int = None
+
+
+def _headers():
+    return dict(HEADERS, **{"x-api-key": API_KEY})
+
+
+def _request(method, url, ends, **kwargs):
+    """session.request with its timeouts capped at the monotonic deadline `ends`.
+
+    A stalled connection raises TimeoutError, as a query still running at
+    the deadline does, instead of blocking until the server gives up.
+    """
+    remaining = ends - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError(f"{method} {url}: deadline passed")
+    timeout = (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+    try:
+        return session.request(
+            method, url, headers=_headers(), timeout=timeout, **kwargs
+        )
+    except requests.Timeout as e:
+        raise TimeoutError(
+            f"{method} {url}: no response within {round(timeout[1], 1)}s"
+        ) from e
+
+
+def create_query(sql_query, ttl_minutes=15, base_url=None, deadline=QUERY_DEADLINE):
+    r = _request(
+        "POST",
+        (base_url or BASE_URL) + "/queries",
+        time.monotonic() + deadline,
+        data=json.dumps({"sql": sql_query, "ttlMinutes": ttl_minutes}),
+    )
+    if r.status_code != 200:
+        raise Exception(
+            "Error creating query, got response: "
+            + r.text
+            + "with status code: "
+            + str(r.status_code)
+        )
+
+    return json.loads(r.text)
+
+
+def poll_intervals(start=0.5, factor=1.5, max_interval=10):
+    """Short waits while a query is likely to be quick, longer ones later on."""
+    interval = start
+    while True:
+        # jitter keeps concurrent pollers from hitting the API in lockstep
+        yield random.uniform(interval / 2, interval)
+        interval = min(interval * factor, max_interval)
+
+
+def _get_page(token, page_number, page_size, base_url, ends):
+    return _request(
+        "GET",
+        (base_url or BASE_URL) + "/queries/" + token,
+        ends,
+        params={"pageNumber": page_number, "pageSize": page_size},
+    )
+
+
+def _raise_for_results(r):
+    raise Exception(
+        "Error getting query results, got response: "
+        + r.text
+        + "with status code: "
+        + str(r.status_code)
+    )
+
+
+def _pages(token, data, page_size, base_url, ends):
+    """Yield a frame per result page, starting with the already fetched `data`.
+
+    Each page goes straight into a frame with the result's column labels, so
+    only one page of parsed JSON rows is alive at a time. ShroomDK responses
+    carry no recordCount, there a short page marks the last one.
+    """
+    rows, total = 0, data.get("recordCount")
+    page_number = 1
+    while True:
+        results = data.get("results") or []
+        rows += len(results)
+        yield pd.DataFrame(results, columns=data["columnLabels"])
+        if (rows >= total) if total is not None else (len(results) < page_size):
+            return
+        page_number += 1
+        r = _get_page(token, page_number, page_size, base_url, ends)
+        if r.status_code != 200:
+            _raise_for_results(r)
+        data = json.loads(r.text)
+        if not data.get("results"):
+            return
+
+
+def _concat(frames):
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def get_query_pages(
+    token, deadline=QUERY_DEADLINE, timing=None, page_size=PAGE_SIZE, base_url=None
+):
+    """Poll until the query has finished, then yield its result page by page.
+
+    node-api reports "running" and ShroomDK "pending" until then; any status
+    but "finished" and "error" is polled again. Polls and page downloads
+    all end by the deadline, seconds from now, or raise TimeoutError.
+    """
+    timing = timing or QueryTiming(token=token)
+    started = time.monotonic()
+    ends = started + deadline
+    intervals = poll_intervals()
+    while True:
+        sent = time.monotonic()
+        r = _get_page(token, 1, page_size, base_url, ends)
+        timing.polls += 1
+
+        if r.status_code == 200:
+            data = json.loads(r.text)
+            if data["status"] == "error":
+                raise Exception(
+                    f"Query {token} failed: {data.get('errors') or data.get('message')}"
+                )
+            if data["status"] == "finished":
+                timing.first_byte_seconds = (
+                    timing.submit_seconds + sent - started + r.elapsed.total_seconds()
+                )
+                yield from _pages(token, data, page_size, base_url, ends)
+                return
+        elif r.status_code != 504:
+            _raise_for_results(r)
+
+        wait = next(intervals)
+        if time.monotonic() - started + wait > deadline:
+            raise TimeoutError(
+                f"Query {token} still running after {timing.polls} polls"
+                f" and {round(time.monotonic() - started, 1)}s"
+            )
+        time.sleep(wait)
+
+
+def get_query_results(
+    token, deadline=QUERY_DEADLINE, timing=None, page_size=PAGE_SIZE, base_url=None
+):
+    return _concat(list(get_query_pages(token, deadline, timing, page_size, base_url)))
+
+
+def iter_pages(sql_query, deadline=QUERY_DEADLINE, page_size=PAGE_SIZE, base_url=None):
+    """Run a query and yield its result frames page by page as they download."""
+    timing = QueryTiming(rows=0)
+    started = time.monotonic()
+    query = create_query(sql_query, base_url=base_url, deadline=deadline)
+    timing.token = query.get("token")
+    timing.submit_seconds = time.monotonic() - started
+    try:
+        # the deadline covers the submission too
+        for page in get_query_pages(
+            timing.token, deadline - timing.submit_seconds, timing, page_size, base_url
+        ):
+            timing.rows += len(page)
+            yield page
+    finally:
+        timing.wall_seconds = time.monotonic() - started
+        timings.append(timing)
+    logger.info("flipside query timing %s", asdict(timing))
+
+
+def get_data(sql_query, deadline=QUERY_DEADLINE, base_url=None):
+    return _concat(list(iter_pages(sql_query, deadline, base_url=base_url)))
+
+
+def stream_data(
+    sql_query,
+    ttl,
+    on_update=None,
+    every=PREVIEW_EVERY,
+    page_size=STREAM_PAGE_SIZE,
+    base_url=None,
+):
+    """Like get_cached_data, but hands the rows so far to on_update as they arrive.
+
+    on_update(df) is called after the first page and then every `every`
+    pages, from the calling thread, so it can redraw Streamlit elements. A
+    cached result is returned without any updates, an expired one while it
+    is refreshed in the background; with no ttl the disk cache is not used.
+    Concurrent calls for the same query share one download, and only the
+    first caller sees the updates.
+    """
+    key = cache.cache_key(sql_query)
+    if ttl is not None and not cache.forcing():
+        df, fresh = cache.load_entry(sql_query, ttl)
+        if df is not None:
+            if not fresh:
+                cache.revalidate(
+                    key,
+                    lambda: _cache_result(
+                        sql_query, ttl, get_data(sql_query, base_url=base_url)
+                    ),
+                )
+            return df
+
+    def stream():
+        frames = []
+        pages = iter_pages(sql_query, page_size=page_size, base_url=base_url)
+        for number, page in enumerate(pages):
+            frames.append(page)
+            if on_update is not None and number % every == 0:
+                frames = [_concat(frames)]
+                on_update(frames[0])
+        return _cache_result(sql_query, ttl, _concat(frames))
+
+    return cache.single_flight(key, stream)
+
+
+def _cache_result(sql_query, ttl, df):
+    if ttl is not None:
+        cache.store(sql_query, df, ttl)
+    return df
+
+
+def get_cached_data(sql_query, ttl):
+    return cache.cached_frame(sql_query, ttl, lambda: get_data(sql_query))
+
+
+def submit_queries(pool, queries, ttl=None):
+    """Start every query on pool and return a {name: Future} dict."""
+    return {
+        name: (
+            pool.submit(get_cached_data, sql, ttl)
+            if ttl
+            else pool.submit(get_data, sql)
+        )
+        for name, sql in queries.items()
+    }
+
+
+def iter_queries(queries, ttl=None, max_workers=None):
+    """Submit every query at once and yield (name, DataFrame) as each one finishes.
+
+    With a ttl, results are served from and saved to the shared disk cache.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(queries)) as pool:
+        futures = {
+            future: name for name, future in submit_queries(pool, queries, ttl).items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def run_queries(queries, ttl=None, max_workers=None):
+    return dict(iter_queries(queries, ttl, max_workers))
@@ -0,0 +1,72 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def bucket_percentages(df, columns, names=None):
+    """Add each column's share of the row total, in percent, to df in one pass.
+
+    The row totals are computed once and the division is broadcast over all
+    columns; the results land in `names` (default: "<column> %").
+    """
+    values = df[columns].to_numpy(dtype="float64")
+    totals = values.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(values, totals, out=values)
+    values *= 100
+    df[names or [column + " %" for column in columns]] = values
+    return df
+
+
+def date_range(df, column, start, end):
+    """Rows of df with start <= column <= end, for a df sorted by column.
+
+    The bounds are found by binary search and the result is a positional
+    slice, so no boolean mask is built over the whole frame.
+    """
+    values = df[column]
+    lo = values.searchsorted(pd.Timestamp(start), side="left")
+    hi = values.searchsorted(pd.Timestamp(end), side="right")
+    return df.iloc[lo:hi]
+
+
+def memory_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _compact_column(values, kind):
+    if kind == "category":
+        return values.astype("category")
+    if kind == "string":
+        return values.astype("string[pyarrow]")
+    if kind == "datetime":
+        return pd.to_datetime(values)
+    if kind in ("integer", "unsigned", "float"):
+        return pd.to_numeric(values, downcast=kind)
+    raise ValueError(f"unknown column kind {kind!r}")
+
+
+def compact(df, schema, name="frame"):
+    """Convert df's columns to the compact dtypes in schema, in place.
+
+    schema maps a column to one of "category" (repeated labels such as
+    addresses or event types), "string" (Arrow-backed strings, for columns of
+    mostly unique values), "datetime", or "integer"/"unsigned"/"float" to
+    downcast to the smallest width that holds the values. Columns missing
+    from df are skipped. The memory before and after is logged.
+    """
+    before = memory_bytes(df)
+    for column, kind in schema.items():
+        if column in df:
+            df[column] = _compact_column(df[column], kind)
+    logger.info(
+        "compacted %s: %.1f MB -> %.1f MB (%d rows)",
+        name,
+        before / 2**20,
+        memory_bytes(df) / 2**20,
+        len(df),
+    )
+    return df
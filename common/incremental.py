@@ -0,0 +1,63 @@
+import pandas as pd
+
+from common import cache
+
+
+def _update(name, build_sql, column, loader, parse):
+    stored = cache.load_table(name)
+    since = None
+    if stored is not None and not stored.empty:
+        since = parse(stored[column]).max()
+
+    df = loader(build_sql(since))
+    if since is not None:
+        stored = stored[parse(stored[column]) < since]
+        df = pd.concat([stored, df[parse(df[column]) >= since]], ignore_index=True)
+
+    df = df.sort_values(column, ignore_index=True, kind="stable")
+    cache.save_table(name, df)
+    return df
+
+
+def _refresh(name, build_sql, column, loader, parse, ttl, load=True):
+    key = "table:" + name
+    age = cache.table_age(name)
+    if ttl is not None and age is not None and not cache.forcing():
+        if age >= ttl:
+            # serve what is stored while the delta is fetched in the background
+            cache.revalidate(
+                key, lambda: _update(name, build_sql, column, loader, parse)
+            )
+        if not load:
+            return None
+        stored = cache.load_table(name)
+        if stored is not None:
+            return stored
+    return cache.single_flight(
+        key, lambda: _update(name, build_sql, column, loader, parse)
+    )
+
+
+def refresh_daily(name, build_sql, date_column, loader, ttl=None, load=True):
+    """Bring the stored table `name` up to date with a delta query.
+
+    build_sql(since) must return SQL for the rows dated on or after `since`,
+    or for the full history when `since` is None. The last stored day is
+    assumed to be partial, so it is queried again and replaced. With a ttl,
+    a table saved less than ttl seconds ago is returned without a query and
+    an older one is returned while it is updated in the background.
+    Concurrent refreshes of a table share one query. With load=False a
+    stored table is not read, only refreshed, and None is returned instead;
+    a table that has to be built is still returned.
+    """
+    return _refresh(name, build_sql, date_column, loader, pd.to_datetime, ttl, load)
+
+
+def refresh_blocks(name, build_sql, block_column, loader, ttl=None, load=True):
+    """Like refresh_daily, with the stored table's last block number as watermark.
+
+    build_sql(since) must return SQL for the rows in blocks since and later.
+    The last stored block is queried again and replaced, in case it was
+    read before all of its rows were indexed.
+    """
+    return _refresh(name, build_sql, block_column, loader, pd.to_numeric, ttl, load)
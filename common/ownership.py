@@ -0,0 +1,176 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class OwnershipLedger:
+    """Current owner of every token in an NFT collection, built from its transfers.
+
+    Keeps tokenid -> owner, owner -> set of tokenids, the time each token
+    last changed hands and every address that ever received one, so holder
+    counts and overlaps between collections are lookups rather than a sort
+    and drop_duplicates over the whole history.
+    sync() applies only the transfers at or after the last one it has seen.
+    snapshots has a row of BLOCK_TIMESTAMP, HOLDERS and TOKENS for every
+    transfer timestamp that changes the counts, so counts over time are a
+    binary search.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.owner = {}
+        self.tokens = {}
+        self.acquired = {}
+        self.receivers = set()
+        self.snapshots = None
+        self.updated_at = None
+
+    @property
+    def holders(self):
+        with self.lock:
+            return list(self.tokens)
+
+    @property
+    def holder_count(self):
+        return len(self.tokens)
+
+    @property
+    def token_count(self):
+        return len(self.owner)
+
+    def _move(self, token, owner, at):
+        previous = self.owner.get(token)
+        if previous == owner and self.acquired[token] == at:
+            return False
+        if previous is not None and previous != owner:
+            held = self.tokens[previous]
+            held.discard(token)
+            if not held:
+                del self.tokens[previous]
+        self.owner[token] = owner
+        self.tokens.setdefault(owner, set()).add(token)
+        self.acquired[token] = at
+        return True
+
+    def _history(self, transfers):
+        """BLOCK_TIMESTAMP, HOLDERS and TOKENS after each timestamp's transfers.
+
+        Computed on the state before transfers are applied: every transfer
+        is +1 token for its receiver and -1 for the previous owner, and an
+        owner's running count crossing 0 adds or removes a holder.
+        """
+        token = pd.Series(transfers.TOKENID.tolist())
+        owner = pd.Series(transfers.NFT_TO_ADDRESS.tolist(), dtype=object)
+        previous = owner.groupby(token, sort=False).shift()
+        first = previous.isna()
+        previous[first] = token[first].map(self.owner)
+        new = previous.isna()
+        moved = previous.ne(owner)
+        sent = moved & ~new
+        events = pd.DataFrame(
+            {
+                "row": np.concatenate([np.flatnonzero(moved), np.flatnonzero(sent)]),
+                "address": pd.concat([owner[moved], previous[sent]]).to_numpy(),
+                "delta": np.repeat([1, -1], [moved.sum(), sent.sum()]),
+            }
+        ).sort_values("row", kind="stable")
+        held = {address: len(tokens) for address, tokens in self.tokens.items()}
+        count = (
+            events.address.map(held).fillna(0).to_numpy()
+            + events.groupby("address", sort=False).delta.cumsum().to_numpy()
+        )
+        # each row's events are for two different owners, so their order
+        # within the row does not matter, only the order of the rows does
+        change = np.where(events.delta > 0, count == 1, -(count == 0).astype(int))
+        holders = self.holder_count + np.bincount(
+            events.row, weights=change, minlength=len(token)
+        ).cumsum().astype(int)
+        tokens = self.token_count + new.to_numpy().cumsum()
+        return pd.DataFrame(
+            {
+                "BLOCK_TIMESTAMP": transfers.BLOCK_TIMESTAMP.to_numpy(),
+                "HOLDERS": holders,
+                "TOKENS": tokens,
+            }
+        ).drop_duplicates("BLOCK_TIMESTAMP", keep="last")
+
+    def apply(self, transfers):
+        """Apply transfers, sorted by BLOCK_TIMESTAMP, on top of the current state."""
+        if transfers.empty:
+            return
+        history = self._history(transfers)
+        latest = transfers.drop_duplicates("TOKENID", keep="last")
+        for token, owner, at in zip(
+            latest.TOKENID.tolist(),
+            latest.NFT_TO_ADDRESS.tolist(),
+            latest.BLOCK_TIMESTAMP.tolist(),
+        ):
+            self._move(token, owner, at)
+        self.receivers.update(transfers.NFT_TO_ADDRESS.unique().tolist())
+        self.updated_at = transfers.BLOCK_TIMESTAMP.iloc[-1]
+        if self.snapshots is not None:
+            # transfers at the last synced timestamp are applied again by sync()
+            kept = self.snapshots.BLOCK_TIMESTAMP < history.BLOCK_TIMESTAMP.iloc[0]
+            history = pd.concat([self.snapshots[kept], history], ignore_index=True)
+        # a snapshot only where the counts change
+        counts = history[["HOLDERS", "TOKENS"]]
+        self.snapshots = history[counts.ne(counts.shift()).any(axis=1)].reset_index(
+            drop=True
+        )
+
+    def sync(self, transfers):
+        """Bring the ledger up to date with a frame of the collection's transfers.
+
+        Rows at the last applied timestamp are applied again, which leaves
+        the owners unchanged, so transfers that share it with the previous
+        sync are not missed. A frame that ends before the last sync (a
+        rebuilt or different history) rebuilds the ledger from scratch.
+        """
+        with self.lock:
+            if self.updated_at is not None and not transfers.empty:
+                if transfers.BLOCK_TIMESTAMP.max() < self.updated_at:
+                    self.reset()
+                else:
+                    transfers = transfers[transfers.BLOCK_TIMESTAMP >= self.updated_at]
+            self.apply(transfers.sort_values("BLOCK_TIMESTAMP", kind="stable"))
+        return self
+
+    def holders_since(self, timestamp):
+        """Owners holding a token they received at or after timestamp."""
+        timestamp = pd.Timestamp(timestamp)
+        with self.lock:
+            return {
+                self.owner[token]
+                for token, at in self.acquired.items()
+                if at >= timestamp
+            }
+
+    def holders_at(self, timestamp):
+        """Holder count after the transfers at or before timestamp, or None."""
+        with self.lock:
+            if self.snapshots is None:
+                return None
+            i = self.snapshots.BLOCK_TIMESTAMP.searchsorted(
+                pd.Timestamp(timestamp), side="right"
+            )
+            return int(self.snapshots.HOLDERS.iloc[i - 1]) if i else None
+
+    def receivers_holding(self, other):
+        """Current owners of other's tokens that ever received one of these."""
+        with self.lock:
+            receivers = set(self.receivers)
+        return {owner for owner in other.holders if owner in receivers}
+
+
+# one ledger per collection, shared by every session in the process
+_ledgers = {}
+_lock = threading.Lock()
+
+
+def ledger(name):
+    with _lock:
+        return _ledgers.setdefault(name, OwnershipLedger())
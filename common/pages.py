@@ -0,0 +1,36 @@
+"""The dashboards the root app.py serves as pages of one Streamlit server.
+
+Every app keeps its own app.py and can still be run on its own. Hosted
+together they share one interpreter, so st.cache entries, the disk cache's
+single-flight loads, the figure cache and the prewarm scheduler serve every
+page, and each page's imports (plotly.subplots, pyarrow.dataset, ...) are
+only paid on its first visit.
+"""
+import os
+import runpy
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# app package -> (page title, icon)
+APPS = {
+    "ethminers": ("Ethereum Miners", "⛏️"),
+    "shroommint": ("ShroomDK NFT", "🍄"),
+    "osmosis_stables": ("Osmosis Stablecoins", "🔬"),
+    "velodrome": ("Velodrome Pools", "🚴"),
+}
+
+
+def script(app):
+    return os.path.join(ROOT, app, "app.py")
+
+
+def page(app):
+    """The app's file under pages/, relative to the root app.py."""
+    number = list(APPS).index(app) + 1
+    return f"pages/{number}_{APPS[app][0].replace(' ', '_')}.py"
+
+
+def run(app):
+    """Run an app's script as the current page, on every rerun of the page."""
+    # a module name per app keeps their st.cache keys apart
+    runpy.run_path(script(app), run_name=app + ".app")
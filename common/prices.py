@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+class PriceIndex:
+    """Sorted price history per symbol, for as-of lookups against other frames.
+
+    lookup() gives each (symbol, time) the symbol's last price at or before
+    that time, with one searchsorted over the symbol's times per symbol
+    instead of a merge that copies the whole frame.
+    """
+
+    def __init__(self, prices, symbol, price, time):
+        self.series = {}
+        prices = prices.sort_values(time, kind="stable")
+        for name, group in prices.groupby(symbol, sort=False, observed=True):
+            self.series[name] = (
+                group[time].to_numpy("datetime64[ns]"),
+                group[price].to_numpy("float64"),
+            )
+
+    def __contains__(self, symbol):
+        return symbol in self.series
+
+    def lookup(self, symbols, times, default=np.nan):
+        """Price of each symbol as of the matching time, default where unknown."""
+        codes, uniques = pd.factorize(np.asarray(symbols))
+        out = np.full(len(codes), default, dtype="float64")
+        times = np.asarray(times, dtype="datetime64[ns]")
+        # rows grouped by symbol with one stable argsort, then one pass per symbol
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        for i, name in enumerate(uniques):
+            if name not in self.series:
+                continue
+            rows = order[bounds[i] : bounds[i + 1]]
+            series_times, series_prices = self.series[name]
+            at = series_times.searchsorted(times[rows], side="right") - 1
+            found = at >= 0
+            out[rows[found]] = series_prices[at[found]]
+        return out
@@ -0,0 +1,116 @@
+"""Opt-in timing and memory instrumentation for app sections.
+
+Set PROFILE_SECTIONS=1 to turn it on. Each `with section("name"):` block then
+records its wall time, rows in/out and the net bytes it allocated (traced
+with tracemalloc). The records are logged as JSON lines and listed in a
+sidebar panel at the end of the rerun. When disabled, section() hands back a
+shared no-op object and profiled() returns the function untouched.
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+ENABLED = os.getenv("PROFILE_SECTIONS", "0").lower() not in ("", "0", "false")
+
+logger = logging.getLogger(__name__)
+
+# records of the most recent reruns, newest last
+runs = deque(maxlen=20)
+_local = threading.local()
+
+
+def _rows(obj):
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def records():
+    if not hasattr(_local, "records"):
+        _local.records = []
+    return _local.records
+
+
+class Section:
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = None if rows_in is None else _rows(rows_in)
+        self.rows_out = None
+
+    def out(self, obj):
+        self.rows_out = _rows(obj)
+        return obj
+
+    def __enter__(self):
+        self.memory = tracemalloc.get_traced_memory()[0]
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record = dict(
+            section=self.name,
+            seconds=round(time.perf_counter() - self.started, 6),
+            rows_in=self.rows_in,
+            rows_out=self.rows_out,
+            allocated_bytes=tracemalloc.get_traced_memory()[0] - self.memory,
+        )
+        records().append(record)
+        logger.info(json.dumps(record))
+
+
+class _Disabled:
+    def out(self, obj):
+        return obj
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_DISABLED = _Disabled()
+
+
+def section(name, rows_in=None):
+    return Section(name, rows_in) if ENABLED else _DISABLED
+
+
+def profiled(name=None):
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Section(name or func.__name__) as s:
+                return s.out(func(*args, **kwargs))
+
+        return wrapper
+
+    return decorate
+
+
+def start():
+    """Begin a new rerun's records, call at the top of the app script."""
+    if ENABLED and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.records = []
+
+
+def panel():
+    """List this rerun's sections in a sidebar expander, call at the end of the script."""
+    if not ENABLED:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    runs.append(records())
+    with st.sidebar.expander("Debug: section timings"):
+        st.dataframe(pd.DataFrame(records()), use_container_width=True)
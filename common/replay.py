@@ -0,0 +1,346 @@
+"""Replay recorded Flipside/ShroomDK and CoinGecko responses from a local server.
+
+Fixtures are JSON files in a directory. Query fixtures hold the SQL text and
+its result set, URL fixtures hold a request path (with query string) and the
+JSON body to send back:
+
+    {"sql": "...", "columnLabels": [...], "columnTypes": [...], "results": [[...]]}
+    {"path": "/api/v3/coins/terrausd/market_chart?...", "body": {...}}
+
+A query fixture can list "match" substrings instead of relying on the exact
+SQL text, for queries that are built from templates.
+
+Queries are served on two endpoints that follow their own protocol: the
+node-api at the root answers "running" while a query runs and sends a
+recordCount with the results, ShroomDK under /shroomdk answers "pending"
+and sends no recordCount (see ENDPOINTS).
+
+    python -m common.replay serve fixtures/ --port 8765 --latency 0.2 --running-polls 2
+    python -m common.replay record-sql query.sql fixtures/nft.json
+    python -m common.replay record-url https://api.coingecko.com/... fixtures/ust.json
+
+Point the apps at the server with FLIPSIDE_BASE_URL, SHROOMDK_BASE_URL and
+COINGECKO_BASE_URL (see env()).
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from common.cache import cache_key, normalize
+
+
+@dataclass
+class ReplayConfig:
+    # seconds added to every response, plus up to `jitter` more
+    latency: float = 0.0
+    jitter: float = 0.0
+    # share of result polls answered with a 504
+    fail_rate: float = 0.0
+    # number of polls answered with the in progress status before the results
+    running_polls: int = 0
+    # share of queries that end with status "error" instead of results
+    error_rate: float = 0.0
+    # share of requests that stall for hang_seconds, to trigger client timeouts
+    hang_rate: float = 0.0
+    hang_seconds: float = 30.0
+    seed: int = None
+
+
+@dataclass
+class Endpoint:
+    # status of a query that has not finished yet
+    in_progress: str = "running"
+    # whether result pages carry the total row count
+    record_count: bool = True
+
+
+# path prefix -> protocol, the longest matching prefix wins
+ENDPOINTS = {
+    "": Endpoint("running", record_count=True),
+    "/shroomdk": Endpoint("pending", record_count=False),
+}
+
+
+def _endpoint(path, endpoints):
+    """The (prefix, Endpoint) serving path, or (None, None) for a non query path."""
+    for prefix in sorted(endpoints, key=len, reverse=True):
+        rest = path[len(prefix) :]
+        if path.startswith(prefix) and (
+            rest.rstrip("/") == "/queries" or rest.startswith("/queries/")
+        ):
+            return prefix, endpoints[prefix]
+    return None, None
+
+
+def _path_key(path):
+    parts = urlsplit(path)
+    return parts.path.rstrip("/") + "?" + urlencode(sorted(parse_qsl(parts.query)))
+
+
+def query_fixture(sql, columns, rows, column_types=None):
+    return dict(
+        sql=sql,
+        columnLabels=list(columns),
+        columnTypes=column_types or ["string"] * len(columns),
+        results=rows,
+    )
+
+
+def frame_fixture(sql, df):
+    return query_fixture(
+        sql, df.columns, json.loads(df.to_json(orient="values", date_format="iso"))
+    )
+
+
+def url_fixture(url, body):
+    return dict(path=_path_key(url), body=body)
+
+
+def save_fixture(path, fixture):
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+
+
+class Fixtures:
+    def __init__(self, fixtures=()):
+        self.queries = {}
+        self.matchers = []
+        self.urls = {}
+        for fixture in fixtures:
+            self.add(fixture)
+
+    @classmethod
+    def load(cls, directory):
+        fixtures = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            with open(path) as f:
+                fixtures.append(json.load(f))
+        return cls(fixtures)
+
+    def add(self, fixture):
+        if "path" in fixture:
+            self.urls[_path_key(fixture["path"])] = fixture["body"]
+        elif "match" in fixture:
+            self.matchers.append(fixture)
+        else:
+            self.queries[cache_key(fixture["sql"])] = fixture
+
+    def query(self, sql):
+        fixture = self.queries.get(cache_key(sql))
+        if fixture is None:
+            text = normalize(sql).lower()
+            for matcher in self.matchers:
+                if all(normalize(part).lower() in text for part in matcher["match"]):
+                    return matcher
+        return fixture
+
+    def url(self, path):
+        return self.urls.get(_path_key(path))
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server_version = "replay"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _delay(self):
+        config, rng = self.server.config, self.server.rng
+        if config.hang_rate and rng.random() < config.hang_rate:
+            time.sleep(config.hang_seconds)
+        time.sleep(config.latency + config.jitter * rng.random())
+
+    def do_POST(self):
+        self._delay()
+        path = urlsplit(self.path).path.rstrip("/")
+        prefix, endpoint = _endpoint(path, self.server.endpoints)
+        if endpoint is None or path != prefix + "/queries":
+            return self._send(404, {"errors": "unknown path " + self.path})
+        length = int(self.headers.get("Content-Length", 0))
+        sql = json.loads(self.rfile.read(length) or b"{}").get("sql", "")
+        fixture = self.server.fixtures.query(sql)
+        if fixture is None:
+            return self._send(400, {"errors": "no fixture for query"})
+        token = uuid.uuid4().hex
+        with self.server.lock:
+            error_rate = self.server.config.error_rate
+            failed = bool(error_rate) and self.server.rng.random() < error_rate
+            self.server.runs[token] = dict(
+                fixture=fixture,
+                endpoint=endpoint,
+                failed=failed,
+                polls=0,
+                started=time.time(),
+            )
+        self._send(200, {"token": token, "cached": False, "errors": None})
+
+    def do_GET(self):
+        self._delay()
+        parts = urlsplit(self.path)
+        prefix, endpoint = _endpoint(parts.path, self.server.endpoints)
+        if endpoint is not None and parts.path.startswith(prefix + "/queries/"):
+            token = parts.path[len(prefix + "/queries/") :]
+            return self._query_result(token, parts.query)
+        body = self.server.fixtures.url(self.path)
+        if body is None:
+            return self._send(404, {"errors": "no fixture for " + self.path})
+        self._send(200, body)
+
+    def _query_result(self, token, query):
+        config, rng = self.server.config, self.server.rng
+        with self.server.lock:
+            run = self.server.runs.get(token)
+            if run is not None:
+                run["polls"] += 1
+        if run is None:
+            return self._send(404, {"errors": "unknown query token"})
+        if config.fail_rate and rng.random() < config.fail_rate:
+            return self._send(504)
+        endpoint = run["endpoint"]
+        if run["polls"] <= config.running_polls:
+            return self._send(
+                200, {"queryId": token, "status": endpoint.in_progress, "results": None}
+            )
+        if run["failed"]:
+            return self._send(
+                200,
+                dict(
+                    queryId=token,
+                    status="error",
+                    results=None,
+                    columnLabels=None,
+                    message="replayed query failure",
+                    errors="replayed query failure",
+                ),
+            )
+
+        fixture = run["fixture"]
+        params = dict(parse_qsl(query))
+        page_size = int(params.get("pageSize", 0)) or len(fixture["results"]) or 1
+        page_number = int(params.get("pageNumber", 1))
+        start = (page_number - 1) * page_size
+        body = dict(
+            queryId=token,
+            status="finished",
+            results=fixture["results"][start : start + page_size],
+            columnLabels=fixture["columnLabels"],
+            columnTypes=fixture.get("columnTypes"),
+            startedAt=_timestamp(run["started"]),
+            endedAt=_timestamp(time.time()),
+            pageNumber=page_number,
+            pageSize=page_size,
+            message=None,
+            errors=None,
+        )
+        if endpoint.record_count:
+            body["recordCount"] = len(fixture["results"])
+        self._send(200, body)
+
+
+def serve(fixtures, config=None, host="127.0.0.1", port=0, endpoints=None):
+    """Start a replay server on a background thread; call .shutdown() to stop it."""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.fixtures = fixtures
+    server.config = config or ReplayConfig()
+    server.endpoints = ENDPOINTS if endpoints is None else endpoints
+    server.rng = random.Random(server.config.seed)
+    server.lock = threading.Lock()
+    server.runs = {}
+    server.url = f"http://{host}:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def env(url):
+    """Environment variables that point every app at a replay server."""
+    return dict(
+        FLIPSIDE_BASE_URL=url,
+        SHROOMDK_BASE_URL=url + "/shroomdk",
+        COINGECKO_BASE_URL=url,
+        API_KEY=os.getenv("API_KEY", "replay"),
+    )
+
+
+def record_sql(sql, path):
+    from common.flipside import get_data
+
+    save_fixture(path, frame_fixture(sql, get_data(sql)))
+
+
+def record_url(url, path):
+    import requests
+
+    r = requests.get(url)
+    r.raise_for_status()
+    save_fixture(path, url_fixture(url, r.json()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m common.replay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = commands.add_parser("serve", help="replay a fixture directory")
+    serve_cmd.add_argument("fixtures")
+    serve_cmd.add_argument("--host", default="127.0.0.1")
+    serve_cmd.add_argument("--port", type=int, default=8765)
+    for name, default in vars(ReplayConfig()).items():
+        serve_cmd.add_argument(
+            "--" + name.replace("_", "-"),
+            type=int if name in ("running_polls", "seed") else float,
+            default=default,
+        )
+
+    sql_cmd = commands.add_parser("record-sql", help="record a live query result")
+    sql_cmd.add_argument("sql_file")
+    sql_cmd.add_argument("fixture")
+
+    url_cmd = commands.add_parser("record-url", help="record a live JSON endpoint")
+    url_cmd.add_argument("url")
+    url_cmd.add_argument("fixture")
+
+    args = parser.parse_args(argv)
+    if args.command == "record-sql":
+        with open(args.sql_file) as f:
+            record_sql(f.read(), args.fixture)
+    elif args.command == "record-url":
+        record_url(args.url, args.fixture)
+    else:
+        config = ReplayConfig(
+            **{name: getattr(args, name) for name in vars(ReplayConfig())}
+        )
+        server = serve(Fixtures.load(args.fixtures), config, args.host, args.port)
+        print(f"replaying {args.fixtures} on {server.url}")
+        for name, value in env(server.url).items():
+            print(f"export {name}={value}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Background refresh of the dashboards' datasets before visitors ask for them.
+
+Each app lists its loaders in <app>/data.py as JOBS = {name: (loader,
+seconds)}. A loader reads through the shared cache (cached_frame,
+stream_data or an incremental table); the scheduler calls it within
+cache.forced() on its own interval, so entries are replaced well before they
+expire and page renders find them fresh. Job health and last-refresh times
+are written to CACHE_DIR/scheduler.json after every run.
+
+    python -m common.scheduler                    # worker process, every app
+    python -m common.scheduler --apps shroommint --once
+    PREWARM=thread streamlit run ethminers/app.py # or a thread in the server
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+
+from common import cache
+
+APPS = ["ethminers", "shroommint", "osmosis_stables"]
+STATUS_PATH = os.path.join(cache.CACHE_DIR, "scheduler.json")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    loader: object = field(repr=False)
+    interval: float
+    next_run: float = 0.0
+    running: bool = False
+    last_started: float = None
+    last_refresh: float = None
+    last_seconds: float = None
+    last_rows: int = None
+    last_error: str = None
+    runs: int = 0
+    failures: int = 0
+
+    def healthy(self, now=None):
+        # one missed refresh is tolerated, the cache TTLs outlast the interval
+        if self.last_refresh is None:
+            return False
+        now = time.time() if now is None else now
+        return now - self.last_refresh < 2 * self.interval
+
+    def status(self, now=None):
+        status = {f.name: getattr(self, f.name) for f in fields(self) if f.repr}
+        status["healthy"] = self.healthy(now)
+        return status
+
+
+class Scheduler(threading.Thread):
+    def __init__(self, max_workers=4, status_path=STATUS_PATH):
+        super().__init__(daemon=True, name="prewarm")
+        self.jobs = {}
+        self.status_path = status_path
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="prewarm")
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.wake = threading.Event()
+
+    def register(self, name, loader, interval):
+        with self.lock:
+            self.jobs[name] = Job(name, loader, interval)
+        self.wake.set()
+
+    def register_app(self, app):
+        module = importlib.import_module(app + ".data")
+        for name, (loader, interval) in module.JOBS.items():
+            self.register(f"{app}.{name}", loader, interval)
+
+    def run_job(self, job):
+        job.last_started = started = time.time()
+        try:
+            with cache.forced():
+                result = job.loader()
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{type(e).__name__}: {e}"
+            logger.warning("refresh of %s failed", job.name, exc_info=True)
+        else:
+            job.last_refresh = time.time()
+            job.last_rows = len(result) if hasattr(result, "__len__") else None
+            job.last_error = None
+        finally:
+            job.runs += 1
+            job.last_seconds = round(time.time() - started, 3)
+            job.next_run = started + job.interval
+            job.running = False
+            self.write_status()
+            self.wake.set()
+        return job
+
+    def run_due(self, wait=False):
+        """Start every job that is due; with wait, block until they are done."""
+        now = time.time()
+        with self.lock:
+            due = [j for j in self.jobs.values() if not j.running and j.next_run <= now]
+            for job in due:
+                job.running = True
+        futures = [self.pool.submit(self.run_job, job) for job in due]
+        if wait:
+            for future in futures:
+                future.result()
+        return due
+
+    def seconds_to_next(self):
+        with self.lock:
+            waiting = [j.next_run for j in self.jobs.values() if not j.running]
+        return max(0.0, min(waiting, default=60.0) - time.time())
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.run_due()
+            self.wake.clear()
+            self.wake.wait(min(self.seconds_to_next(), 60.0))
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+        self.pool.shutdown(wait=False)
+
+    def status(self):
+        now = time.time()
+        with self.lock:
+            jobs = [job.status(now) for job in self.jobs.values()]
+        return dict(updated=now, pid=os.getpid(), jobs=jobs)
+
+    def write_status(self):
+        status = self.status()
+        # unique per writer, the pool's threads write the status concurrently
+        tmp = f"{self.status_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.status_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(status, f, indent=2)
+            os.replace(tmp, self.status_path)
+        except OSError:
+            logger.warning("could not write %s", self.status_path, exc_info=True)
+
+
+def read_status(path=STATUS_PATH):
+    """The last status a scheduler wrote, or None if none has run."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def start(apps=APPS):
+    """Start a scheduler thread for apps in this process, once."""
+    global _scheduler
+    with _lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+            for app in apps:
+                _scheduler.register_app(app)
+            _scheduler.start()
+    return _scheduler
+
+
+def maybe_start():
+    """Start the in-process scheduler when PREWARM=thread, otherwise do nothing.
+
+    Call from an app script; the thread outlives the rerun and is shared by
+    every session of the server.
+    """
+    if os.getenv("PREWARM", "").lower() == "thread":
+        return start()
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m common.scheduler")
+    parser.add_argument("--apps", nargs="+", default=APPS, choices=APPS)
+    parser.add_argument("--once", action="store_true", help="refresh every job once")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s"
+    )
+
+    scheduler = Scheduler()
+    for app in args.apps:
+        scheduler.register_app(app)
+    if args.once:
+        jobs = scheduler.run_due(wait=True)
+        return 0 if all(job.last_error is None for job in jobs) else 1
+
+    scheduler.start()
+    try:
+        while scheduler.is_alive():
+            scheduler.join(1)
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
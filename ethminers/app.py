@@ -4,18 +4,29 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
-from shroomdk import ShroomDK
-
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.io as pio
 
 import os
+import sys
 
-pio.templates.default = "plotly_dark"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the script reruns on every interaction, add the repo root only once
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-API_KEY = os.getenv("API_KEY")
+from common.charts import (
+    CHART_MAX_POINTS,
+    cached_figure,
+    data_version,
+    decimate,
+    log_payload,
+)
+from common.frames import bucket_percentages, compact, date_range
+from common.profiling import panel, section, start
+from common.scheduler import maybe_start
+from ethminers.data import load_daily_miners_table, load_miner_blocks
 
 st.set_page_config(
     page_title="Ethereum - Miners",
@@ -33,68 +44,231 @@ hide_st_style = """
             </style>
             """
 st.markdown(hide_st_style, unsafe_allow_html=True)
-
-sdk = ShroomDK(API_KEY)
+start()
+maybe_start()
 
 
 @st.cache(allow_output_mutation=True, show_spinner=False, ttl=30 * 60)
-def load_data(sql):
-    return pd.DataFrame(sdk.query(sql).records)
-
-
-with st.spinner("Mining some data, Please wait..."):
-    df_daily_miners = load_data(
-        """ 
-    select 
-        block_timestamp::date as date,
-        count(distinct miner) as miners,
-        sum(tx_count) as txs
-    from ethereum.core.fact_blocks
-    group by date
-    order by date
-            """
+def load_daily_miners():
+    df = load_daily_miners_table()
+    return compact(
+        df, dict(date="datetime", miners="integer", txs="integer"), "daily_miners"
+    )
+
+
+cats = [
+    "less than 10 transactions",
+    "10 to 100 transactions",
+    "100 to 200 transactions",
+    "200 to 300 transactions",
+    "300 to 500 transactions",
+    "more than 500 transactions",
+]
+cat_percentages = [
+    "10 or less transactions %",
+    "10 to 100 transactions %",
+    "100 to 200 transactions %",
+    "200 to 300 transactions %",
+    "300 to 500 transactions %",
+    "more than 500 transactions %",
+]
+
+
+def miner_category(blocks):
+    return (
+        blocks.pivot_table(
+            index=["miner", "year"],
+            columns="category",
+            values="blocks",
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        )
+        .reindex(columns=cats, fill_value=0)
+        .rename_axis(columns=None)
+        .reset_index()
+    )
+
+
+def approx_median(buckets):
+    # the median lies in the first bucket that covers half of the blocks,
+    # assume its blocks are spread evenly between the bucket's min and max
+    half = buckets.blocks.sum() / 2
+    covered = buckets.blocks.cumsum()
+    bucket = buckets[covered >= half].iloc[0]
+    before = covered[bucket.name] - bucket.blocks
+    return bucket["min"] + (half - before) / bucket.blocks * (
+        bucket["max"] - bucket["min"]
+    )
+
+
+def year_summary(blocks):
+    blocks = blocks.assign(
+        category=pd.Categorical(blocks.category, categories=cats, ordered=True)
+    )
+    buckets = blocks.groupby(["year", "category"], observed=True).agg(
+        blocks=("blocks", "sum"), min=("min", "min"), max=("max", "max")
+    )
+    summary = blocks.groupby("year").agg(
+        blocks=("blocks", "sum"),
+        txs=("txs", "sum"),
+        min=("min", "min"),
+        max=("max", "max"),
     )
+    summary["avg"] = summary.txs / summary.blocks
+    summary["median"] = buckets.groupby(level="year").apply(
+        lambda year: approx_median(year.reset_index(drop=True))
+    )
+    return summary.reset_index().sort_values("year", ignore_index=True)
+
+
+def plot_miners(daily):
+    miners_points = decimate(daily, "date", "miners", CHART_MAX_POINTS // 2)
+    txs_points = decimate(daily, "date", "txs", CHART_MAX_POINTS // 2)
+    fig_miners = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_miners.add_trace(
+        go.Scatter(
+            x=miners_points.date,
+            y=miners_points.miners,
+            name="Number of miners",
+        )
+    )
+    fig_miners.add_trace(
+        go.Scatter(
+            x=txs_points.date,
+            y=txs_points.txs,
+            name="Number of transactions",
+        ),
+        secondary_y=True,
+    )
+
+    fig_miners.update_xaxes(title="Year")
+    fig_miners.update_yaxes(title="Miners")
+    fig_miners.update_yaxes(title="Transactions", secondary_y=True)
+    fig_miners.update_layout(
+        template="plotly_dark",
+        title="Daily transactions and miners",
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
+    )
+    return fig_miners
+
+
+def plot_year_summary(summary):
+    fig_year_summary = px.line(
+        summary,
+        x="year",
+        y=["max", "median", "avg"],
+        template="plotly_dark",
+        title="Per block summary of transactions mined by year",
+        labels=dict(max="Max", median="Median", avg="Average"),
+    )
+    fig_year_summary.update_xaxes(title="Year")
+    fig_year_summary.update_yaxes(title="Transactions")
+    fig_year_summary.update_layout(
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        legend_title_text="",
+    )
+    return fig_year_summary
+
+
+def plot_yearly_cats(yearly_categories):
+    fig_yearly_cats = px.bar(
+        yearly_categories, x="year", y=cats, text_auto=True, template="plotly_dark"
+    )
+    fig_yearly_cats.update_layout(
+        legend_title_text="Catgories",
+        title="Number of transactions per mined block changed overtime",
+    )
+    fig_yearly_cats.update_xaxes(title="Year")
+    fig_yearly_cats.update_yaxes(title="Number of transactions")
+    return fig_yearly_cats
+
+
+def plot_year_perc(yearly_categories):
+    fig_year_perc = px.area(
+        yearly_categories,
+        x="year",
+        y=cat_percentages,
+        template="plotly_dark",
+    )
+    fig_year_perc.update_traces(line_width=0)
+    fig_year_perc.update_layout(
+        legend_title_text="Catgories", title="Percentage of block transactions overtime"
+    )
+    fig_year_perc.update_yaxes(title="Percentage (%)")
+    fig_year_perc.update_xaxes(title="Year")
+    return fig_year_perc
+
+
+def plot_miner_dist(miner_categories):
+    fig_miner_dist = px.box(
+        miner_categories,
+        y=cat_percentages,
+        boxmode="overlay",
+        template="plotly_dark",
+    )
+    fig_miner_dist.update_xaxes(title="Mined block size category")
+    fig_miner_dist.update_yaxes(title="Percentage (%)")
+    return fig_miner_dist
+
+
+def plot_miner_histogram(miner_categories, x, title):
+    fig = px.histogram(miner_categories, x=x, title=title, template="plotly_dark")
+    fig.update_yaxes(title="Miners")
+    return fig
+
+
+# one row per miner, year and category: miners and categories repeat a lot
+blocks_schema = dict(
+    miner="category",
+    year="datetime",
+    category="category",
+    blocks="integer",
+    txs="integer",
+    min="integer",
+    max="integer",
+)
+
+
+def preview_blocks(placeholder, blocks):
+    blocks = blocks.rename(columns=str.lower)
+    by_year = blocks.groupby(["year", "category"]).blocks.sum().reset_index()
+    with placeholder.container():
+        st.caption(f"Loaded {len(blocks):,} miner rows so far...")
+        st.plotly_chart(
+            px.bar(
+                by_year,
+                x="year",
+                y="blocks",
+                color="category",
+                category_orders=dict(category=cats),
+                template="plotly_dark",
+                title="Mined blocks by year (loading)",
+            ),
+            use_container_width=True,
+        )
+
 
-    df_year_summary = load_data(
-        """
-select
-    date_trunc(year, block_timestamp) as year,
-    avg(tx_count) as avg,
-    min(tx_count) as min,
-    max(tx_count) as max,
-    median(tx_count) as median,
-    count(case when tx_count < 10 then miner end) as "less than 10 transactions",
-    count(case when tx_count >= 10 and tx_count < 100 then miner end) as "10 to 100 transactions",
-    count(case when tx_count >= 100 and tx_count < 200 then miner end) as "100 to 200 transactions",
-    count(case when tx_count >= 200 and tx_count < 300 then miner end) as "200 to 300 transactions",
-    count(case when tx_count >= 300 and tx_count < 500 then miner end) as "300 to 500 transactions",
-    count(case when tx_count >= 500 then miner end) as "more than 500 transactions"
-  from ethereum.core.fact_blocks
-  group by year
-  order by year
-    """
-    )
-    df_miner_category = load_data(
-        """
-    select miner,
-    count(tx_count) as tot,
-    date_trunc(year, block_timestamp) as year,
-    avg(tx_count) as avg,
-    min(tx_count) as min,
-    max(tx_count) as max,
-    median(tx_count) as median,
-  count(case when tx_count < 10 then miner end) as "less than 10 transactions",
-  count(case when tx_count >= 10 and tx_count < 100 then miner end) as "10 to 100 transactions",
-  count(case when tx_count >= 100 and tx_count < 200 then miner end) as "100 to 200 transactions",
-  count(case when tx_count >= 200 and tx_count < 300 then miner end) as "200 to 300 transactions",
-  count(case when tx_count >= 300 and tx_count < 500 then miner end) as "300 to 500 transactions",
-  count(case when tx_count >= 500 then miner end) as "more than 500 transactions"
-  from ethereum.core.fact_blocks
-  group by miner, year
-    """
-    )
-
-df_daily_miners.date = pd.to_datetime(df_daily_miners.date)
+# st calls inside are only the loading preview, drawn on a cache miss
+@st.cache(
+    allow_output_mutation=True,
+    show_spinner=False,
+    ttl=30 * 60,
+    suppress_st_warning=True,
+)
+def load_miner_views():
+    placeholder = st.empty()
+    blocks = load_miner_blocks(lambda partial: preview_blocks(placeholder, partial))
+    placeholder.empty()
+    blocks = compact(blocks, blocks_schema, "miner_blocks")
+    summary = year_summary(blocks)
+    category = miner_category(blocks)
+    # sorted by year so slider ranges can be found by binary search
+    return summary, category.sort_values("year", ignore_index=True)
+
+
+with st.spinner("Mining some data, Please wait..."), section("load"):
+    df_daily_miners = load_daily_miners()
 
 col1, col2 = st.columns(2)
 slider_start = col1.slider(
@@ -115,51 +289,35 @@ slider_end = col2.slider(
 st.markdown("---")
 st.subheader("Block summary")
 mchart1, mchart2 = st.columns(2)
-df_daily_miners_vis = df_daily_miners[df_daily_miners.date >= slider_start]
-df_daily_miners_vis = df_daily_miners_vis[df_daily_miners_vis.date <= slider_end]
-fig_miners = make_subplots(specs=[[{"secondary_y": True}]])
-fig_miners.add_trace(
-    go.Scatter(
-        x=df_daily_miners_vis.date,
-        y=df_daily_miners_vis.miners,
-        name="Number of miners",
+with section("filter:daily_miners", df_daily_miners) as s:
+    df_daily_miners_vis = s.out(
+        date_range(df_daily_miners, "date", slider_start, slider_end)
+    )
+# figures are rebuilt only when the data or the date range changes
+daily_filters = (data_version(df_daily_miners), slider_start, slider_end)
+with section("figure:fig_miners", df_daily_miners_vis):
+    fig_miners = cached_figure(
+        "fig_miners", daily_filters, lambda: plot_miners(df_daily_miners_vis)
+    )
+    mchart1.plotly_chart(
+        log_payload(fig_miners, "fig_miners"), use_container_width=True
     )
-)
-fig_miners.add_trace(
-    go.Scatter(
-        x=df_daily_miners_vis.date,
-        y=df_daily_miners_vis.txs,
-        name="Number of transactions",
-    ),
-    secondary_y=True,
-)
 
-fig_miners.update_xaxes(title="Year")
-fig_miners.update_yaxes(title="Miners")
-fig_miners.update_yaxes(title="Transactions", secondary_y=True)
-fig_miners.update_layout(
-    title="Daily transactions and miners",
-    legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01),
-)
-mchart1.plotly_chart(fig_miners, use_container_width=True)
-
-df_year_summary.year = pd.to_datetime(df_year_summary.year)
-df_year_summary_vis = df_year_summary[df_year_summary.year >= slider_start]
-df_year_summary_vis = df_year_summary_vis[df_year_summary_vis.year <= slider_end]
-fig_year_summary = px.line(
-    df_year_summary_vis,
-    x="year",
-    y=["max", "median", "avg"],
-    title="Per block summary of transactions mined by year",
-    labels=dict(max="Max", median="Median", avg="Average"),
-)
-fig_year_summary.update_xaxes(title="Year")
-fig_year_summary.update_yaxes(title="Transactions")
-fig_year_summary.update_layout(
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-    legend_title_text="",
-)
-mchart2.plotly_chart(fig_year_summary, use_container_width=True)
+with st.spinner("Mining miner activity, Please wait..."), section("load:miner_views"):
+    df_year_summary, df_miner_category = load_miner_views()
+
+miner_filters = (data_version(df_miner_category), slider_start, slider_end)
+with section("filter:year_summary", df_year_summary) as s:
+    df_year_summary_vis = s.out(
+        date_range(df_year_summary, "year", slider_start, slider_end)
+    )
+with section("figure:fig_year_summary", df_year_summary_vis):
+    fig_year_summary = cached_figure(
+        "fig_year_summary",
+        miner_filters,
+        lambda: plot_year_summary(df_year_summary_vis),
+    )
+    mchart2.plotly_chart(fig_year_summary, use_container_width=True)
 st.info(
     f"The number of transactions that were mined in early stages of Ethereum seems to be very low compared to the amount of transactions"
     f" We have today, the transaction count per block mined seems to have risen since late 2017 with the end of the 2017 crypto winter. The max transactions had peaked in 2021 and current average is {round(df_year_summary[-1:].avg.values[0], 2)} transactions per minded block"
@@ -168,121 +326,29 @@ st.info(
 )
 
 chart3, chart4 = st.columns(2)
-df_miner_category.year = pd.to_datetime(df_miner_category.year)
-df_miner_category_vis = df_miner_category[df_miner_category.year >= slider_start]
-df_miner_category_vis = df_miner_category_vis[df_miner_category_vis.year <= slider_end]
-cats = [
-    "less than 10 transactions",
-    "10 to 100 transactions",
-    "100 to 200 transactions",
-    "200 to 300 transactions",
-    "300 to 500 transactions",
-    "more than 500 transactions",
-]
-
-yearly_categories = df_miner_category_vis.groupby("year").sum()[cats].reset_index()
-
-fig_yearly_cats = px.bar(yearly_categories, x="year", y=cats, text_auto=True)
-fig_yearly_cats.update_layout(
-    legend_title_text="Catgories",
-    title="Number of transactions per mined block changed overtime",
-)
-fig_yearly_cats.update_xaxes(title="Year")
-fig_yearly_cats.update_yaxes(title="Number of transactions")
-chart3.plotly_chart(fig_yearly_cats, use_container_width=True)
-
-yearly_categories["10 or less transactions %"] = (
-    yearly_categories["less than 10 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
-    )
-)
-yearly_categories["10 to 100 transactions %"] = (
-    yearly_categories["10 to 100 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
+with section("filter:miner_category", df_miner_category) as s:
+    df_miner_category_vis = s.out(
+        date_range(df_miner_category, "year", slider_start, slider_end)
     )
-)
-yearly_categories["100 to 200 transactions %"] = (
-    yearly_categories["100 to 200 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
-    )
-)
-yearly_categories["200 to 300 transactions %"] = (
-    yearly_categories["200 to 300 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
+with section("aggregate:yearly_categories", df_miner_category_vis) as s:
+    yearly_categories = s.out(
+        df_miner_category_vis.groupby("year")[cats].sum().reset_index()
     )
-)
-yearly_categories["300 to 500 transactions %"] = (
-    yearly_categories["300 to 500 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
-    )
-)
-yearly_categories["more than 500 transactions %"] = (
-    yearly_categories["more than 500 transactions"]
-    * 100
-    / (
-        yearly_categories["less than 10 transactions"]
-        + yearly_categories["10 to 100 transactions"]
-        + yearly_categories["100 to 200 transactions"]
-        + yearly_categories["200 to 300 transactions"]
-        + yearly_categories["300 to 500 transactions"]
-        + yearly_categories["more than 500 transactions"]
+
+with section("figure:fig_yearly_cats", yearly_categories):
+    fig_yearly_cats = cached_figure(
+        "fig_yearly_cats", miner_filters, lambda: plot_yearly_cats(yearly_categories)
     )
-)
+    chart3.plotly_chart(fig_yearly_cats, use_container_width=True)
 
-fig_year_perc = px.area(
-    yearly_categories,
-    x="year",
-    y=[
-        "10 or less transactions %",
-        "10 to 100 transactions %",
-        "100 to 200 transactions %",
-        "200 to 300 transactions %",
-        "300 to 500 transactions %",
-        "more than 500 transactions %",
-    ],
-)
-fig_year_perc.update_traces(line_width=0)
-fig_year_perc.update_layout(
-    legend_title_text="Catgories", title="Percentage of block transactions overtime"
-)
-fig_year_perc.update_yaxes(title="Percentage (%)")
-fig_year_perc.update_xaxes(title="Year")
-chart4.plotly_chart(fig_year_perc, use_container_width=True)
+with section("aggregate:yearly_percentages", yearly_categories):
+    bucket_percentages(yearly_categories, cats, cat_percentages)
+
+with section("figure:fig_year_perc", yearly_categories):
+    fig_year_perc = cached_figure(
+        "fig_year_perc", miner_filters, lambda: plot_year_perc(yearly_categories)
+    )
+    chart4.plotly_chart(fig_year_perc, use_container_width=True)
 
 st.info(
     "It's clear that transaction per mined block has risen since the beginning. There were mostly blocks with less than 10 "
@@ -292,115 +358,46 @@ st.info(
 )
 st.markdown("---")
 st.subheader("Miner activities")
-miner_categories = df_miner_category_vis.groupby("miner").sum()[cats].reset_index()
-miner_categories["10 or less transactions %"] = (
-    miner_categories["less than 10 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
-    )
-)
-miner_categories["10 to 100 transactions %"] = (
-    miner_categories["10 to 100 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
+with section("aggregate:miner_categories", df_miner_category_vis) as s:
+    miner_categories = s.out(
+        df_miner_category_vis.groupby("miner", observed=True)[cats].sum().reset_index()
     )
-)
-miner_categories["100 to 200 transactions %"] = (
-    miner_categories["100 to 200 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
-    )
-)
-miner_categories["200 to 300 transactions %"] = (
-    miner_categories["200 to 300 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
-    )
-)
-miner_categories["300 to 500 transactions %"] = (
-    miner_categories["300 to 500 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
-    )
-)
-miner_categories["more than 500 transactions %"] = (
-    miner_categories["more than 500 transactions"]
-    * 100
-    / (
-        miner_categories["less than 10 transactions"]
-        + miner_categories["10 to 100 transactions"]
-        + miner_categories["100 to 200 transactions"]
-        + miner_categories["200 to 300 transactions"]
-        + miner_categories["300 to 500 transactions"]
-        + miner_categories["more than 500 transactions"]
+    bucket_percentages(miner_categories, cats, cat_percentages)
+
+with section("figure:fig_miner_dist", miner_categories):
+    fig_miner_dist = cached_figure(
+        "fig_miner_dist", miner_filters, lambda: plot_miner_dist(miner_categories)
     )
-)
-fig_miner_dist = px.box(
-    miner_categories,
-    y=[
-        "10 or less transactions %",
-        "10 to 100 transactions %",
-        "100 to 200 transactions %",
-        "200 to 300 transactions %",
-        "300 to 500 transactions %",
-        "more than 500 transactions %",
-    ],
-    boxmode="overlay",
-)
-fig_miner_dist.update_xaxes(title="Mined block size category")
-fig_miner_dist.update_yaxes(title="Percentage (%)")
-st.plotly_chart(fig_miner_dist, use_container_width=True)
+    st.plotly_chart(fig_miner_dist, use_container_width=True)
 st.info(
     "This chart shows that how different miners interested in mining blocks with different transaction counts, for example there is ONLY 1 miner who has mined 92.3% of their blocks with 500+ transactions."
     " While there are miners who have 100% of their mined blocks had less than 10 transactions, but as we saw the transactions per block increased significantly since 2020, we see that miners who mined less than 10 transaction block reduced dramatically"
 )
 
-fig_10orless = px.histogram(
-    miner_categories,
-    x="10 or less transactions %",
-    title="Do miners mine only smaller blocks",
-)
-fig_10orless.update_yaxes(title="Miners")
-cat1, cat2 = st.columns(2)
-cat1.plotly_chart(fig_10orless, use_container_width=True)
-
-fig_500more = px.histogram(
-    miner_categories,
-    x="more than 500 transactions %",
-    title="Or what percentage of larger blocks do miners mine",
-)
-fig_500more.update_yaxes(title="Miners")
-cat2.plotly_chart(fig_500more, use_container_width=True)
+with section("figure:fig_10orless", miner_categories):
+    fig_10orless = cached_figure(
+        "fig_10orless",
+        miner_filters,
+        lambda: plot_miner_histogram(
+            miner_categories,
+            "10 or less transactions %",
+            "Do miners mine only smaller blocks",
+        ),
+    )
+    cat1, cat2 = st.columns(2)
+    cat1.plotly_chart(fig_10orless, use_container_width=True)
+
+with section("figure:fig_500more", miner_categories):
+    fig_500more = cached_figure(
+        "fig_500more",
+        miner_filters,
+        lambda: plot_miner_histogram(
+            miner_categories,
+            "more than 500 transactions %",
+            "Or what percentage of larger blocks do miners mine",
+        ),
+    )
+    cat2.plotly_chart(fig_500more, use_container_width=True)
 st.info(
     "Looking at the smallest and largest block mines, we see that since 2020 only 9 miners had mined 90%+ of their blocks with less than 10 transactions"
     " while there are only 2 miners having more than 50% of their mined blocks with 500 or more transcations."
@@ -442,3 +439,5 @@ with st.expander("Resources"):
     st.markdown(
         "Following velocity page has the queries used in this analysis: https://app.flipsidecrypto.com/velocity/queries/19b75d3b-aeec-4a7b-903b-2b560907a7ef"
     )
+
+panel()
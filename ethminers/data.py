@@ -0,0 +1,72 @@
+import os
+
+from common.flipside import get_data, stream_data
+from common.incremental import refresh_daily
+
+SHROOMDK_BASE_URL = os.getenv("SHROOMDK_BASE_URL", "https://api.flipsidecrypto.com")
+TTL = 30 * 60
+
+
+def query_frame(sql):
+    # frames are built page by page from the result rows instead of a dict
+    # per row, the column names lowercased as in the ShroomDK records
+    return get_data(sql, base_url=SHROOMDK_BASE_URL).rename(columns=str.lower)
+
+
+def daily_miners_sql(since):
+    where = "" if since is None else f"where block_timestamp >= '{since:%Y-%m-%d}'"
+    return f"""
+    select 
+        block_timestamp::date as date,
+        count(distinct miner) as miners,
+        sum(tx_count) as txs
+    from ethereum.core.fact_blocks
+    {where}
+    group by date
+    order by date
+            """
+
+
+def load_daily_miners_table():
+    return refresh_daily(
+        "ethminers_daily_miners",
+        daily_miners_sql,
+        "date",
+        query_frame,
+        ttl=TTL,
+    )
+
+
+miner_blocks_sql = """
+select
+    miner,
+    date_trunc(year, block_timestamp) as year,
+    case
+        when tx_count < 10 then 'less than 10 transactions'
+        when tx_count < 100 then '10 to 100 transactions'
+        when tx_count < 200 then '100 to 200 transactions'
+        when tx_count < 300 then '200 to 300 transactions'
+        when tx_count < 500 then '300 to 500 transactions'
+        else 'more than 500 transactions'
+    end as category,
+    count(*) as blocks,
+    sum(tx_count) as txs,
+    min(tx_count) as min,
+    max(tx_count) as max
+  from ethereum.core.fact_blocks
+  where tx_count is not null
+  group by miner, year, category
+    """
+
+
+def load_miner_blocks(on_update=None):
+    return stream_data(
+        miner_blocks_sql, TTL, on_update, base_url=SHROOMDK_BASE_URL
+    ).rename(columns=str.lower)
+
+
+# loaders for the background refresh scheduler: name -> (loader, seconds)
+JOBS = dict(
+    daily_miners=(load_daily_miners_table, 20 * 60),
+    miner_blocks=(load_miner_blocks, 20 * 60),
+)
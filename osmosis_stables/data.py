@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from common.cache import cached_frame
+from common.flipside import BASE_URL as FLIPSIDE_BASE_URL
+from common.prices import PriceIndex
+
+COINGECKO_BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com")
+
+SOURCES = dict(
+    tfx=f"{FLIPSIDE_BASE_URL}/api/v2/queries/d16b470b-9e22-492e-aa13-51b9047e7a61/data/latest",
+    to_stbl_swaps=f"{FLIPSIDE_BASE_URL}/api/v2/queries/c97dc80b-cf50-497b-857f-4529bef247d2/data/latest",
+    from_stbl_swaps=f"{FLIPSIDE_BASE_URL}/api/v2/queries/d26867a8-93a0-428b-9549-7ec6d5d7af40/data/latest",
+    ust_price=f"{COINGECKO_BASE_URL}/api/v3/coins/terrausd/market_chart?vs_currency=usd&days=200&interval=daily",
+)
+
+
+def read_json(url, ttl=60 * 60):
+    return cached_frame(url, ttl, lambda: pd.read_json(url))
+
+
+def fetch_sources(sources=SOURCES):
+    # every source has its own disk cache entry, only stale ones hit the network
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = {name: pool.submit(read_json, url) for name, url in sources.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def process_data(tfx, to_stbl_swaps, from_stbl_swaps, ust_price):
+    tfx, to_stbl_swaps, from_stbl_swaps, ust_price = (
+        df.copy() for df in (tfx, to_stbl_swaps, from_stbl_swaps, ust_price)
+    )
+    ust_price["date"] = ust_price["prices"].apply(lambda x: x[0])
+    ust_price["price"] = ust_price["prices"].apply(lambda x: x[1])
+    ust_price["date"] = pd.to_datetime(ust_price["date"], unit="ms").dt.date
+    ust_price = ust_price[:-1][["date", "price"]]
+    ust_price["symbol"] = "USTC"
+    ust_price["date"] = pd.to_datetime(ust_price["date"])
+    prices = PriceIndex(ust_price, "symbol", "price", "date")
+
+    tfx.DATE = pd.to_datetime(tfx.DATE)
+    to_stbl_swaps.DATE = pd.to_datetime(to_stbl_swaps.DATE)
+    from_stbl_swaps.DATE = pd.to_datetime(from_stbl_swaps.DATE)
+
+    tfx = tfx.fillna(0)
+    to_stbl_swaps = to_stbl_swaps.fillna(0)
+    from_stbl_swaps = from_stbl_swaps.fillna(0)
+
+    # the last known price on or before the day, stables without one are 1
+    tfx["price"] = prices.lookup(tfx.TOKEN, tfx.DATE, default=1)
+    tfx["usd_amount"] = tfx.Amount * tfx.price
+    tfx["usd_ibc_amount"] = tfx["IBC-Out amount"] * tfx.price
+
+    to_stbl_swaps["price"] = prices.lookup(
+        to_stbl_swaps.TO_TOKEN, to_stbl_swaps.DATE, default=1
+    )
+    to_stbl_swaps["usd_amount"] = to_stbl_swaps.TO_AMOUNT * to_stbl_swaps.price
+
+    from_stbl_swaps["price"] = prices.lookup(
+        from_stbl_swaps.FROM_TOKEN, from_stbl_swaps.DATE, default=1
+    )
+    from_stbl_swaps["usd_amount"] = from_stbl_swaps.FROM_AMOUNT * from_stbl_swaps.price
+
+    # sorted by date so slider ranges can be found by binary search
+    return (
+        tfx.sort_values("DATE", ignore_index=True),
+        to_stbl_swaps.sort_values("DATE", ignore_index=True),
+        from_stbl_swaps.sort_values("DATE", ignore_index=True),
+    )
+
+
+# loaders for the background refresh scheduler: name -> (loader, seconds)
+JOBS = {name: (partial(read_json, url), 45 * 60) for name, url in SOURCES.items()}
@@ -0,0 +1,3 @@
+from common.pages import run
+
+run("osmosis_stables")
@@ -0,0 +1,98 @@
+from functools import partial
+
+from common.cache import load_table, table_age, table_modified
+from common.flipside import get_cached_data, get_data, stream_data
+from common.incremental import refresh_blocks
+
+TTL = 10 * 60
+
+shroomdk_address = "0xdfb57b6e16ddb97aeb8847386989f4dca7202146"
+god_mode_address = "0x903e2f5d42ee23156d548dd46bb84b7873789e44"
+
+
+def transfers_sql(nft_address, since):
+    where = "" if since is None else f"and block_number >= {since}"
+    return f"""
+    select block_number, block_timestamp, tokenid, nft_from_address, nft_to_address, event_type from ethereum.core.ez_nft_transfers 
+    where nft_address='{nft_address}'
+    {where}
+"""
+
+
+def sync_transfers(name, nft_address, on_update=None, load=True):
+    """The collection's transfers, from a local table shared by every visitor.
+
+    A refresh (at most every TTL seconds, in the background while the stored
+    table is served) only queries the blocks since the last stored one. The
+    first build streams the full history, handing the rows so far to
+    on_update; later refreshes are small deltas that may run on a pool
+    thread, away from the page, so they get no updates. With load=False a
+    stored table is only refreshed, not read, and None is returned.
+    """
+    table = "shroommint_" + name
+    loader = get_data
+    if on_update is not None and table_age(table) is None:
+        loader = lambda sql: stream_data(sql, None, on_update)
+    return refresh_blocks(
+        table,
+        lambda since: transfers_sql(nft_address, since),
+        "BLOCK_NUMBER",
+        loader,
+        ttl=TTL,
+        load=load,
+    )
+
+
+def transfers_version(name, nft_address, on_update=None):
+    """The mtime of the collection's table, after sync_transfers() if it is due.
+
+    A stored table is not read here: a fresh one is left alone and a stale
+    one is refreshed in the background. The app can keep the frame in memory
+    keyed on this, so a rerun with nothing new does no I/O beyond a stat,
+    and a later save gives a new version.
+    """
+    table = "shroommint_" + name
+    age = table_age(table)
+    if age is None or age >= TTL:
+        sync_transfers(name, nft_address, on_update, load=False)
+    return table_modified(table)
+
+
+def load_transfers(name):
+    """The collection's stored transfers, as sync_transfers() last saved them."""
+    return load_table("shroommint_" + name)
+
+
+bounty_rewarders = """
+select count(distinct event_inputs:to) as bounty_hunters from ethereum.core.fact_event_logs
+  where origin_from_address='0xc2f41b3a1ff28fd2a6eee76ee12e51482fcfd11f'
+  and event_inputs:to in (select nft_to_address from ethereum.core.ez_nft_transfers
+  where nft_address='0xdfb57b6e16ddb97aeb8847386989f4dca7202146')
+"""
+
+tx_fails = """
+select block_timestamp, from_address, to_address, 'Ethereum' as chain, tx_fee
+from ethereum.core.fact_transactions
+where to_address='0xdfb57b6e16ddb97aeb8847386989f4dca7202146'
+  and status = 'FAIL'
+union all
+select block_timestamp, from_address, to_address, 'Arbitrum' as chain, tx_fee
+from arbitrum.core.fact_transactions
+where to_address='0xdfb57b6e16ddb97aeb8847386989f4dca7202146'
+union all
+select block_timestamp, from_address, to_address, 'Binance' as chain, tx_fee
+from bsc.core.fact_transactions
+where to_address='0xdfb57b6e16ddb97aeb8847386989f4dca7202146'
+union all
+select block_timestamp, from_address, to_address, 'Polygon' as chain, tx_fee
+from polygon.core.fact_transactions
+where to_address='0xdfb57b6e16ddb97aeb8847386989f4dca7202146'
+"""
+
+# loaders for the background refresh scheduler: name -> (loader, seconds)
+JOBS = dict(
+    nft=(partial(sync_transfers, "nft", shroomdk_address), 5 * 60),
+    god_mode=(partial(sync_transfers, "god_mode", god_mode_address), 5 * 60),
+    bounty_rewarders=(partial(get_cached_data, bounty_rewarders, TTL), 5 * 60),
+    tx_fails=(partial(get_cached_data, tx_fails, TTL), 5 * 60),
+)
@@ -1,12 +1,22 @@
-from datetime import date, datetime
 import os
-import pandas as pd
+import sys
 import streamlit as st
-import requests
-import json
-import time
 
-import plotly.express as px
-import plotly.graph_objects as go
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the script reruns on every interaction, add the repo root only once
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
 
-df = pd.read_parquet('data/pool_txs_proc.parquet')
\ No newline at end of file
+from velodrome.data import load_pool_txs
+
+
+# one scan per set of arguments, reruns and other sessions reuse the frame;
+# days added by python -m velodrome.etl show up within the ttl
+@st.cache(allow_output_mutation=True, show_spinner=False, ttl=30 * 60, max_entries=16)
+def pool_txs(columns=None, pools=None, tokens=None, start=None, end=None):
+    return load_pool_txs(columns, pools, tokens, start, end)
+
+
+# views narrow this with columns=, pools=, tokens=, start= and end=, which
+# are pushed down to the Parquet scan
+df = pool_txs()
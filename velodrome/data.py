@@ -0,0 +1,98 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+
+# relative to the app's working directory, as the dashboard has always run,
+# or next to this file when served from elsewhere (the root app.py)
+DATA_DIR = os.getenv("VELODROME_DATA_DIR") or (
+    "data"
+    if os.path.isdir("data")
+    else os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+POOL_TXS = os.path.join(DATA_DIR, "pool_txs_proc.parquet")
+# written by python -m velodrome.etl, preferred over the flat file
+POOL_TXS_DIR = os.path.join(DATA_DIR, "pool_txs")
+TOKENS = os.path.join(DATA_DIR, "op_tokens.parquet")
+
+# DATE=<day>/POOL_ADDRESS=<pool>/part-0.parquet, both are also columns
+PARTITIONING = ds.partitioning(
+    pa.schema([("DATE", pa.date32()), ("POOL_ADDRESS", pa.string())]), flavor="hive"
+)
+
+# memory mapped reads decompress straight from the page cache, saving the
+# copy of each compressed column chunk a buffered read makes first; the
+# decoded columns and the frame are still private to each process
+_filesystem = fs.LocalFileSystem(use_mmap=True)
+
+
+def pool_txs_path():
+    return POOL_TXS_DIR if os.path.isdir(POOL_TXS_DIR) else POOL_TXS
+
+
+def pool_txs_dataset(path=None):
+    """The pool transactions, the partitioned directory or the flat file.
+
+    Only the directory listing (or the footer) is read here; rows are read
+    by to_table(), one row group at a time.
+    """
+    path = path or pool_txs_path()
+    return ds.dataset(
+        path,
+        format="parquet",
+        partitioning=PARTITIONING if os.path.isdir(path) else None,
+        filesystem=_filesystem,
+    )
+
+
+def _timestamp(value):
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def pool_txs_filter(pools=None, tokens=None, start=None, end=None, dates=False):
+    """A dataset filter: any of pools, either side in tokens, start <= time <= end.
+
+    With dates, the range is also put on the DATE partition column, so whole
+    directories are pruned before any file is opened.
+    """
+    conditions = []
+    if pools is not None:
+        conditions.append(ds.field("POOL_ADDRESS").isin(list(pools)))
+    if tokens is not None:
+        tokens = list(tokens)
+        conditions.append(
+            ds.field("TOKEN0").isin(tokens) | ds.field("TOKEN1").isin(tokens)
+        )
+    if start is not None:
+        conditions.append(ds.field("BLOCK_TIMESTAMP") >= _timestamp(start))
+        if dates:
+            conditions.append(ds.field("DATE") >= _timestamp(start).date())
+    if end is not None:
+        conditions.append(ds.field("BLOCK_TIMESTAMP") <= _timestamp(end))
+        if dates:
+            conditions.append(ds.field("DATE") <= _timestamp(end).date())
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def load_pool_txs(
+    columns=None, pools=None, tokens=None, start=None, end=None, path=None
+):
+    """Pool transactions as a DataFrame, reading only what the view needs.
+
+    columns projects the read; pools, tokens and the time range are pushed
+    down to the scan, which skips every row group whose min/max statistics
+    rule it out and filters the rest in Arrow before converting to pandas.
+    """
+    dataset = pool_txs_dataset(path)
+    partitioned = "DATE" in dataset.schema.names
+    table = dataset.to_table(
+        columns=columns,
+        filter=pool_txs_filter(pools, tokens, start, end, dates=partitioned),
+    )
+    # hand Arrow's buffers over column by column to keep the peak down
+    return table.to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,151 @@
+"""Build the dashboard's partitioned pool transaction dataset from raw exports.
+
+Raw pool transactions (Parquet or CSV files with BLOCK_TIMESTAMP, TX_HASH,
+EVENT_NAME, POOL_ADDRESS, TOKEN0, TOKEN1, AMOUNT0, AMOUNT1) are joined to
+op_tokens.parquet for each side's symbol and decimals, sorted by pool and
+time, and written to data/pool_txs/DATE=<day>/POOL_ADDRESS=<pool>/ with
+min/max statistics on every row group. A run only writes the days at or
+after the last one already stored. The stored rows of every day it writes
+are merged with the export's and deduplicated first, so an export may start
+or end partway through a day and may overlap the previous one.
+
+    python -m velodrome.etl exports/pool_txs_*.parquet
+    python -m velodrome.etl exports/2022-09.csv --output data/pool_txs --full
+"""
+import argparse
+import logging
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from velodrome.data import PARTITIONING, POOL_TXS_DIR, TOKENS, pool_txs_dataset
+
+ROW_GROUP_SIZE = int(os.getenv("VELODROME_ROW_GROUP_SIZE", 64 * 1024))
+# exports carry no log index, so an event is identified by its contents
+KEY = ["TX_HASH", "POOL_ADDRESS", "EVENT_NAME", "BLOCK_TIMESTAMP", "AMOUNT0", "AMOUNT1"]
+
+logger = logging.getLogger(__name__)
+
+
+def read_raw(paths):
+    frames = [
+        pd.read_csv(path) if path.endswith(".csv") else pd.read_parquet(path)
+        for path in paths
+    ]
+    txs = pd.concat(frames, ignore_index=True)
+    txs["BLOCK_TIMESTAMP"] = pd.to_datetime(txs.BLOCK_TIMESTAMP)
+    for column in ("POOL_ADDRESS", "TOKEN0", "TOKEN1"):
+        txs[column] = txs[column].str.lower()
+    return txs
+
+
+def join_tokens(txs, tokens):
+    """Add <side>_SYMBOL and <side>_DECIMALS for TOKEN0 and TOKEN1."""
+    tokens = tokens.assign(ADDRESS=tokens.ADDRESS.str.lower()).set_index("ADDRESS")
+    for side in ("TOKEN0", "TOKEN1"):
+        txs[side + "_SYMBOL"] = txs[side].map(tokens.SYMBOL)
+        txs[side + "_DECIMALS"] = txs[side].map(tokens.DECIMALS).astype("Int64")
+    unknown = txs.TOKEN0_SYMBOL.isna() | txs.TOKEN1_SYMBOL.isna()
+    if unknown.any():
+        logger.warning(
+            "%d transactions have a token missing from op_tokens", unknown.sum()
+        )
+    return txs
+
+
+def stored_days(output):
+    """Days already written to output, sorted."""
+    if not os.path.isdir(output):
+        return []
+    days = [
+        name.split("=", 1)[1] for name in os.listdir(output) if name.startswith("DATE=")
+    ]
+    return sorted(pd.to_datetime(days).date)
+
+
+def merge_stored(txs, output):
+    """txs plus the stored rows of the days it touches, which write() replaces."""
+    days = set(stored_days(output)) & set(txs.BLOCK_TIMESTAMP.dt.date)
+    if not days:
+        return txs
+    dataset = pool_txs_dataset(output)
+    stored = dataset.to_table(
+        columns=[c for c in txs.columns if c in dataset.schema.names],
+        filter=ds.field("DATE").isin(pa.array(sorted(days), pa.date32())),
+    ).to_pandas()
+    merged = pd.concat([stored, txs], ignore_index=True)
+    # the export's copy of an event wins over the stored one
+    return merged.drop_duplicates(KEY, keep="last", ignore_index=True)
+
+
+def write(txs, output):
+    # pool then time order: each file's row groups cover disjoint time
+    # ranges, so their statistics let a scan skip most of them
+    txs = txs.assign(DATE=txs.BLOCK_TIMESTAMP.dt.date).sort_values(
+        ["DATE", "POOL_ADDRESS", "BLOCK_TIMESTAMP"], kind="stable", ignore_index=True
+    )
+    partitions = len(txs.drop_duplicates(["DATE", "POOL_ADDRESS"]))
+    table = pa.Table.from_pandas(txs, preserve_index=False)
+    options = ds.ParquetFileFormat().make_write_options(
+        compression="zstd", write_statistics=True
+    )
+    ds.write_dataset(
+        table,
+        output,
+        format="parquet",
+        partitioning=PARTITIONING,
+        file_options=options,
+        basename_template="part-{i}.parquet",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=min(ROW_GROUP_SIZE, 1024),
+        # sorted input fills one partition at a time, however many there are
+        max_partitions=max(partitions, 1024),
+        # the (day, pool) directories written here are replaced as a whole
+        existing_data_behavior="delete_matching",
+    )
+    return txs
+
+
+def run(paths, output=POOL_TXS_DIR, tokens_path=TOKENS, full=False):
+    started = time.perf_counter()
+    txs = read_raw(paths)
+    days = stored_days(output)
+    if days and not full:
+        # the last stored day may have been partial, write it again
+        txs = txs[txs.BLOCK_TIMESTAMP.dt.date >= days[-1]]
+    if txs.empty:
+        logger.info("%s is up to date", output)
+        return txs
+    txs = merge_stored(txs, output)
+    txs = write(join_tokens(txs, pd.read_parquet(tokens_path)), output)
+    logger.info(
+        "wrote %d transactions over %d days to %s in %.1fs",
+        len(txs),
+        txs.DATE.nunique(),
+        output,
+        time.perf_counter() - started,
+    )
+    return txs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m velodrome.etl")
+    parser.add_argument("paths", nargs="+", help="raw Parquet or CSV exports")
+    parser.add_argument("--output", default=POOL_TXS_DIR)
+    parser.add_argument("--tokens", default=TOKENS)
+    parser.add_argument(
+        "--full", action="store_true", help="rewrite every day in the exports"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s"
+    )
+    run(args.paths, args.output, args.tokens, args.full)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())